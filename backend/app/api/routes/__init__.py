@@ -1,5 +0,0 @@
-from fastapi import APIRouter
-from api.routes import tasks
-
-router = APIRouter()
-router.include_router(tasks.router)
\ No newline at end of file
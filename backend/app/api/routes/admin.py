@@ -0,0 +1,39 @@
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+
+from services.category_cache import category_cache
+from services.category_registry import category_registry
+from services.plan_cache import plan_cache
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+def require_admin(token: Optional[str]):
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        # admin endpoints are disabled unless a token is configured
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not secrets.compare_digest(token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@router.post("/categories/reload")
+def reload_categories(x_admin_token: Optional[str] = Header(default=None)):
+    """Reload the category table without a redeploy."""
+    require_admin(x_admin_token)
+    try:
+        classifier = category_registry.reload()
+    except Exception as exc:
+        raise HTTPException(status_code=422, detail=f"Categories not reloaded: {exc}")
+
+    return {
+        "version": classifier.version,
+        "categories": len(classifier),
+        "cache": category_cache.stats(),
+    }
+
+@router.get("/cache")
+def cache_stats(x_admin_token: Optional[str] = Header(default=None)):
+    require_admin(x_admin_token)
+    return {"categories": category_cache.stats(), "plans": plan_cache.stats()}
@@ -0,0 +1,60 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.metrics import registry
+from services.category_cache import category_cache
+from services.executor import plan_executor
+from services.plan_cache import plan_cache
+
+router = APIRouter(tags=["system"])
+
+def cache_metrics():
+    categories = category_cache.stats()
+    plans = plan_cache.stats()
+    lines = [
+        "# HELP fehrist_cache_hits_total Cache hits by cache.",
+        "# TYPE fehrist_cache_hits_total counter",
+        f'fehrist_cache_hits_total{{cache="categories"}} {categories["hits"]}',
+        f'fehrist_cache_hits_total{{cache="plans"}} {plans["hits"]}',
+        "# HELP fehrist_cache_misses_total Cache misses by cache.",
+        "# TYPE fehrist_cache_misses_total counter",
+        f'fehrist_cache_misses_total{{cache="categories"}} {categories["misses"]}',
+        f'fehrist_cache_misses_total{{cache="plans"}} {plans["misses"]}',
+        "# HELP fehrist_cache_entries Entries currently held by cache.",
+        "# TYPE fehrist_cache_entries gauge",
+        f'fehrist_cache_entries{{cache="categories"}} {categories["size"]}',
+    ]
+    if "entries" in plans:
+        # only known for the in-process backend
+        lines.append(f'fehrist_cache_entries{{cache="plans"}} {plans["entries"]}')
+    lines += [
+        "# HELP fehrist_cache_coalesced_total Cache misses served by another request's build.",
+        "# TYPE fehrist_cache_coalesced_total counter",
+        f'fehrist_cache_coalesced_total{{cache="plans"}} {plans["coalesced"]}',
+    ]
+    if "errors" in plans:
+        lines += [
+            "# HELP fehrist_cache_errors_total Failed calls to the shared cache backend.",
+            "# TYPE fehrist_cache_errors_total counter",
+            f'fehrist_cache_errors_total{{cache="plans"}} {plans["errors"]}',
+        ]
+    return lines
+
+def executor_metrics():
+    stats = plan_executor.stats()
+    return [
+        "# HELP fehrist_plan_running Plans currently running on the plan executor.",
+        "# TYPE fehrist_plan_running gauge",
+        f'fehrist_plan_running {stats["running"]}',
+        "# HELP fehrist_plan_waiting Plans admitted and waiting for an executor slot.",
+        "# TYPE fehrist_plan_waiting gauge",
+        f'fehrist_plan_waiting {stats["waiting"]}',
+    ]
+
+registry.add_collector(cache_metrics)
+registry.add_collector(executor_metrics)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of request, planner-phase and cache metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -3,5 +3,5 @@ from fastapi import APIRouter
 router = APIRouter(tags=["system"])
 
 @router.get("/ping")
-def ping():
+async def ping():
     return {"pong": True}
\ No newline at end of file
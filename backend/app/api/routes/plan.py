@@ -1,230 +1,216 @@
+import json
+import logging
 import math
-from dataclasses import dataclass
-from typing import List, Optional, Any, Union
-from fastapi import APIRouter
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Literal, Optional, Any, Sequence, Type, Union, cast
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
 from models.plan import (
     Task,
     SplitInfo,
     PlanBlock,
+    PlanBatchGenerateRequest,
+    PlanCandidatesRequest,
+    PlanCandidatesResponse,
     PlanGenerateRequest,
     PlanGenerateResponse,
+    PlanPatchRequest,
+    PlanPatchResponse,
     PlanRegenerateRequest,
     PlanRegenerateResponse,
+    SchedulingProfile,
 )
 
-import re
+from core.auth import AuthUser, get_optional_user
+from core.config import database_configured
+from core.metrics import span
+from services.categories import CategoryClassifier
+from services.executor import PlannerBusy, is_small_plan, plan_executor
+from services.category_cache import category_cache
+from services.category_registry import category_registry
+from services.packing import pack_durations, plan_utilization
+from services.plan_cache import plan_cache, plan_cache_key
+from services.plan_json import PlanJSONResponse, dumps, render_plan, use_plain_blocks
+from services.plan_quality import plan_quality
+from services.plan_records import OpenWorkBlock, TaskChunk
+from services.profiles import DEFAULT_PROFILE, UnknownProfileError, profile_registry
+from services.task_arrays import noisy_order, pack, partition_sorted, should_vectorize
+from services.workers import PLAN_WORKERS, get_process_pool
+
 import random
 
-def load_categories():
-    try:
-        from data.categories import CATEGORIES
-        if isinstance(CATEGORIES, dict):
-            return CATEGORIES
-        return {}
-    except Exception:
-        return {}
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/plan", tags=["plan"])
 
-# Internal helper: represents a chunk of a Task (so we always carry split metadata)
-@dataclass
-class TaskChunk:
-    task: Task          # original task object (for id, priority, ... read-only)
-    remaining: int      # remaining minutes in this chunk (duration of this chunk)
-    total_parts: int    # how many parts the original task is split into
-    next_part: int      # 1-based index for this chunk (which part it is)
+TENANT_HEADER = "x-tenant-id"
+QUICK_TASK_MINUTES = DEFAULT_PROFILE.quickTaskMinutes
 
 # -------------------------
-# Generate route
+# Scheduler
 # -------------------------
-@router.post("/generate", response_model=PlanGenerateResponse)
-def generate_plan(payload: PlanGenerateRequest, preserve_order: bool = False):
-
-    # -----------------------
-    # 1) Prepare tasks: filter completed/deleted
-    # -----------------------
-    tasks: List[Task] = [t for t in payload.tasks if t.status not in (2, 3)]
-    if not tasks:
-        return PlanGenerateResponse(blocks=[], totalDurationMinutes=0, totalBlocks=0, quickTaskUsed=False)
-
-    # split quick vs normal
-    quick_tasks: List[Task] = [t for t in tasks if is_quick_task(t)]
-    normal_tasks: List[Union[Task, TaskChunk]] = [t for t in tasks if not is_quick_task(t)]
-
-    # quick motivation selection
-    quick_task_used = False
-    quick_motivation: Optional[Task] = None
-    if quick_tasks:
-        quick_motivation = sort_tasks(quick_tasks)[0]
-        quick_tasks.remove(quick_motivation)
-        quick_task_used = True
-
-    # sorting
-    if not preserve_order:
-        # sort_tasks expects List[Task]; normal_tasks currently contains Task only at this point
-        normal_tasks = sort_tasks([t for t in normal_tasks if isinstance(t, Task)])  # type: ignore[assignment]
-        quick_tasks = sort_tasks(quick_tasks)
-
-    # context grouping
-    categories = load_categories()
-    # apply_context_grouping expects Task list; operate on the pure-Task list and then rebuild normal_tasks
-    task_only = [t for t in normal_tasks if isinstance(t, Task)]
-    grouped = apply_context_grouping(task_only, categories)
-    # rebuild normal_tasks from grouped tasks (there are no TaskChunk yet at this point)
-    normal_tasks = grouped[:]  # now contains Task instances initially
-
-    # -----------------------
-    # Scheduling variables
-    # -----------------------
-    plan: List[PlanBlock] = []
-    blockId = 1
-    current_work_block: Optional[dict] = None
-
+class PlanScheduler:
+    """
+    Block/break state machine behind generate_plan.
+
+    Holds the plan built so far plus the break accounting (work since the last break,
+    substantial blocks), so scheduling can also resume from the middle of an existing
+    plan (see /plan/patch). With `plain=True` blocks are emitted as plain dicts in the
+    PlanBlock shape instead of models (the PLAN_RESPONSE_MODE fast path). With
+    `packing="optimal"` the micro-task batches are bin-packed instead of filled greedily.
+    """
+
+    # default timings; scheduler_for() builds a subclass per SchedulingProfile
     blockLength = 30
     shortBreak = 5
     longBreak = 15
-
-    substantial_blocks = 0
-    work_since_last_break = 0
+    longBreakEvery = 4
     CONTINUOUS_WORK_THRESHOLD = 40
+    quickTaskMinutes = QUICK_TASK_MINUTES
+
+    def __init__(self, blockId: int = 1, work_since_last_break: int = 0, substantial_blocks: int = 0,
+                 plain: bool = False, packing: str = "greedy"):
+        # PlanBlock models, or dicts in the PlanBlock shape with plain=True
+        self.plan: List[Any] = []
+        self.plain = plain
+        self.packing = packing
+        self._block = dict if plain else PlanBlock
+        self._split_info = dict if plain else SplitInfo
+        self.blockId = blockId
+        self.current_work_block: Optional[OpenWorkBlock] = None
+        # per-request id table: blocks hold one shared string per distinct task id, and
+        # split keys refer to tasks by their index here
+        self.task_ids: List[str] = []
+        self._task_index: dict = {}
+        self.work_since_last_break = work_since_last_break
+        self.substantial_blocks = substantial_blocks
 
     # -----------------------
     # Helpers
     # -----------------------
-    def _start_work_block_if_needed():
-        nonlocal current_work_block, blockId
-        if current_work_block is None:
-            current_work_block = {
-                "blockId": blockId,
-                "durationMinutes": 0,
-                "tasks": [],
-                # store dict entries for splitInfos while building: {"originalTaskId","part","totalParts"}
-                "splitInfos": []
-            }
-
-    def add_to_work_block(duration: int, items: List[Union[Task, TaskChunk]]):
+    def _start_work_block_if_needed(self) -> OpenWorkBlock:
+        if self.current_work_block is None:
+            self.current_work_block = OpenWorkBlock(blockId=self.blockId, durationMinutes=0, tasks=[],
+                                                    splits=[], split_keys=set())
+        return self.current_work_block
+
+    def _task_id_index(self, tid: str) -> int:
+        index = self._task_index.get(tid)
+        if index is None:
+            index = self._task_index[tid] = len(self.task_ids)
+            self.task_ids.append(tid)
+        return index
+
+    def add_to_work_block(self, duration: int, items: Sequence[Union[Task, TaskChunk]]):
         """
         Add duration and items to the current work block.
         If adding would overflow the block, finalize the current block and start a new one.
         After adding, if the block exactly reaches or exceeds blockLength, finalize it immediately
         so subsequent additions go to a fresh block.
         """
-        nonlocal current_work_block, blockId
-
         # If current block exists and this addition would overflow it -> finalize current block first.
-        if current_work_block and (current_work_block["durationMinutes"] + duration > blockLength):
-            finalize_current_work_block()
+        if self.current_work_block and (self.current_work_block.durationMinutes + duration > self.blockLength):
+            self.finalize_current_work_block()
 
         # Ensure a block exists now
-        if current_work_block is None:
-            current_work_block = {
-                "blockId": blockId,
-                "durationMinutes": 0,
-                "tasks": [],
-                "splitInfos": []
-            }
+        block = self._start_work_block_if_needed()
 
         # Add duration
-        current_work_block["durationMinutes"] += duration
+        block.durationMinutes += duration
 
         # Add tasks + splitInfos
+        task_ids = self.task_ids
         for it in items:
             if isinstance(it, TaskChunk):
-                tid = it.task.id
-                entry = {
-                    "originalTaskId": tid,
-                    "part": it.next_part,
-                    "totalParts": it.total_parts
-                }
+                index = self._task_id_index(it.task.id)
+                key = (index, it.next_part, it.total_parts)
                 # avoid duplicates by key
-                if not any(
-                    si.get("originalTaskId") == entry["originalTaskId"] and
-                    si.get("part") == entry["part"] and
-                    si.get("totalParts") == entry["totalParts"]
-                    for si in current_work_block["splitInfos"]
-                ):
-                    current_work_block["splitInfos"].append(entry)
+                if key not in block.split_keys:
+                    block.split_keys.add(key)
+                    block.splits.append(key)
             else:
-                tid = it.id
+                index = self._task_id_index(it.id)
 
-            current_work_block["tasks"].append(tid)
+            block.tasks.append(task_ids[index])
 
         # If block is full (reached length) finalize it immediately to avoid accidental mixing later
-        if current_work_block["durationMinutes"] >= blockLength:
-            finalize_current_work_block()
+        if block.durationMinutes >= self.blockLength:
+            self.finalize_current_work_block()
 
-    def finalize_current_work_block():
-        nonlocal current_work_block, plan, blockId
-        if not current_work_block:
+    def finalize_current_work_block(self):
+        block = self.current_work_block
+        if not block:
             return
 
-        si_list: Optional[List[SplitInfo]] = None
-        if current_work_block.get("splitInfos"):
-            si_list = [SplitInfo(**s) for s in current_work_block["splitInfos"]]
+        si_list: Optional[list] = None
+        if block.splits:
+            split_info = self._split_info
+            ids = self.task_ids
+            si_list = [split_info(originalTaskId=ids[i], part=part, totalParts=total) for i, part, total in block.splits]
 
-        plan.append(
-            PlanBlock(
-                blockId=current_work_block["blockId"],
+        self.plan.append(
+            self._block(
+                blockId=block.blockId,
                 type="work",
-                durationMinutes=current_work_block["durationMinutes"],
-                tasks=current_work_block["tasks"],
+                durationMinutes=block.durationMinutes,
+                tasks=block.tasks,
                 splitInfos=si_list,
             )
         )
-        blockId += 1
-        current_work_block = None
-
-    def add_break(duration: int):
-        nonlocal plan, blockId
-        plan.append(
-            PlanBlock(
-                blockId=blockId,
+        self.blockId += 1
+        self.current_work_block = None
+
+    def add_break(self, duration: int):
+        self.plan.append(
+            self._block(
+                blockId=self.blockId,
                 type="break",
                 durationMinutes=duration,
                 tasks=[],
                 splitInfos=None,
             )
         )
-        blockId += 1
+        self.blockId += 1
 
-    def maybe_add_break(last_block_duration: int):
+    def maybe_add_break(self, last_block_duration: int):
         """
         Update continuous-work and add a break if threshold passed.
         Always finalizes the current work block before adding a break.
         """
-        nonlocal work_since_last_break, substantial_blocks
-
-        work_since_last_break += last_block_duration
+        self.work_since_last_break += last_block_duration
         if last_block_duration >= 20:
-            substantial_blocks += 1
+            self.substantial_blocks += 1
 
-        if work_since_last_break < CONTINUOUS_WORK_THRESHOLD:
+        if self.work_since_last_break < self.CONTINUOUS_WORK_THRESHOLD:
             return
 
         # finalize and add break
-        finalize_current_work_block()
+        self.finalize_current_work_block()
 
-        # long break every 4 substantial_blocks (only when >0)
-        if substantial_blocks > 0 and (substantial_blocks % 4 == 0):
-            add_break(longBreak)
+        # long break every longBreakEvery substantial_blocks (only when >0)
+        if self.substantial_blocks > 0 and (self.substantial_blocks % self.longBreakEvery == 0):
+            self.add_break(self.longBreak)
         else:
-            add_break(shortBreak)
+            self.add_break(self.shortBreak)
 
-        work_since_last_break = 0
+        self.work_since_last_break = 0
 
     # -----------------------
     # Step 1: Quick motivation
     # -----------------------
-    if quick_motivation:
+    def add_quick_motivation(self, quick_motivation: Task):
         dur = quick_motivation.durationMinutes
-        add_to_work_block(dur, [quick_motivation])
-        maybe_add_break(dur)
+        self.add_to_work_block(dur, [quick_motivation])
+        self.maybe_add_break(dur)
 
     # -----------------------
     # Step 2: Anchor task (first normal)
     # -----------------------
-    if normal_tasks:
-        first = normal_tasks.pop(0)
+    def add_anchor(self, normal_queue: deque):
+        first = normal_queue.popleft()
         # ensure we operate on Task (not TaskChunk) for anchor initial split
         if isinstance(first, TaskChunk):
             # defensive: if a chunk somehow exists here
@@ -235,12 +221,12 @@ def generate_plan(payload: PlanGenerateRequest, preserve_order: bool = False):
         else:
             t_obj = first
             remaining_total = t_obj.durationMinutes
-            total_parts = math.ceil(remaining_total / blockLength)
+            total_parts = math.ceil(remaining_total / self.blockLength)
             start_part = 1
 
-        dur = min(remaining_total, blockLength)
+        dur = min(remaining_total, self.blockLength)
         chunk = TaskChunk(task=t_obj, remaining=dur, total_parts=total_parts, next_part=start_part)
-        add_to_work_block(dur, [chunk])
+        self.add_to_work_block(dur, [chunk])
 
         leftover = remaining_total - dur
         if leftover > 0:
@@ -251,164 +237,1084 @@ def generate_plan(payload: PlanGenerateRequest, preserve_order: bool = False):
                 total_parts=total_parts,
                 next_part=start_part + 1
             )
-            normal_tasks.insert(0, leftover_chunk)
+            normal_queue.appendleft(leftover_chunk)
 
         # If the current block somehow exceeded blockLength (anchor+quick motivation), finalize it now.
-        if current_work_block and current_work_block["durationMinutes"] > blockLength:
-            finalize_current_work_block()
+        if self.current_work_block and self.current_work_block.durationMinutes > self.blockLength:
+            self.finalize_current_work_block()
 
-        maybe_add_break(dur)
+        self.maybe_add_break(dur)
 
     # -----------------------
     # Step 3: Micro-task batch (quick_tasks)
     # -----------------------
-    # Ensure any overfull block is finalized before batching micro tasks (defensive)
-    if current_work_block and current_work_block["durationMinutes"] > blockLength:
-        finalize_current_work_block()
-
-    while quick_tasks:
-        used = 0
-        batch: List[Task] = []
-        for t in list(quick_tasks):
-            if used + t.durationMinutes <= blockLength:
+    def add_quick_batches(self, quick_tasks: List[Task]):
+        # Ensure any overfull block is finalized before batching micro tasks (defensive)
+        if self.current_work_block and self.current_work_block.durationMinutes > self.blockLength:
+            self.finalize_current_work_block()
+
+        if self.packing == "optimal" and self.pack_quick_batches(quick_tasks):
+            return
+
+        # walk quick_tasks with a cursor instead of removing from the front
+        q_pos = 0
+        q_count = len(quick_tasks)
+        while q_pos < q_count:
+            used = 0
+            batch: List[Task] = []
+            while q_pos < q_count and used + quick_tasks[q_pos].durationMinutes <= self.blockLength:
+                t = quick_tasks[q_pos]
                 batch.append(t)
                 used += t.durationMinutes
-                quick_tasks.remove(t)
-            else:
-                break
+                q_pos += 1
+
+            if not batch:
+                # defensive fallback
+                t = quick_tasks[q_pos]
+                q_pos += 1
+                batch = [t]
+                used = t.durationMinutes
 
-        if not batch:
-            # defensive fallback
-            t = quick_tasks.pop(0)
-            batch = [t]
-            used = t.durationMinutes
+            self.add_to_work_block(used, batch)
+            self.maybe_add_break(used)
 
-        add_to_work_block(used, batch)
-        maybe_add_break(used)
+    def pack_quick_batches(self, quick_tasks: List[Task]) -> bool:
+        """
+        Step 3 with bin packing: the room left in the block the opening steps left open
+        is filled first, then the rest go into as few full blocks as the packer finds.
+        Returns False, having placed nothing, when the packer falls back to greedy.
+        """
+        if not quick_tasks:
+            return True
+        block = self.current_work_block
+        room = self.blockLength - block.durationMinutes if block else 0
+        bins = pack_durations([t.durationMinutes for t in quick_tasks], self.blockLength, room)
+        if bins is None:
+            return False
+        for indexes in bins:
+            batch = [quick_tasks[i] for i in indexes]
+            used = sum(t.durationMinutes for t in batch)
+            self.add_to_work_block(used, batch)
+            self.maybe_add_break(used)
+        return True
 
     # -----------------------
     # Step 4: Remaining normal tasks (handle Task or TaskChunk)
     # -----------------------
-    while normal_tasks:
-        item = normal_tasks.pop(0)
-        if isinstance(item, TaskChunk):
-            t_obj = item.task
-            remaining = item.remaining
-            total_parts = item.total_parts
-            part_index = item.next_part
-        else:
-            t_obj = item
-            remaining = t_obj.durationMinutes
-            total_parts = math.ceil(remaining / blockLength)
-            part_index = 1
+    def add_normal_tasks(self, normal_queue: deque):
+        blockLength = self.blockLength
+        while normal_queue:
+            item = normal_queue.popleft()
+            if isinstance(item, TaskChunk):
+                t_obj = item.task
+                remaining = item.remaining
+                total_parts = item.total_parts
+                part_index = item.next_part
+            else:
+                t_obj = item
+                remaining = t_obj.durationMinutes
+                total_parts = math.ceil(remaining / blockLength)
+                part_index = 1
 
-        while remaining > 0:
-            dur = min(remaining, blockLength)
-            chunk = TaskChunk(task=t_obj, remaining=dur, total_parts=total_parts, next_part=part_index)
+            while remaining > 0:
+                dur = min(remaining, blockLength)
+                chunk = TaskChunk(task=t_obj, remaining=dur, total_parts=total_parts, next_part=part_index)
 
-            add_to_work_block(dur, [chunk])
+                self.add_to_work_block(dur, [chunk])
 
-            # update continuous counters
-            work_since_last_break += dur
-            if dur >= 20:
-                substantial_blocks += 1
+                # update continuous counters
+                self.work_since_last_break += dur
+                if dur >= 20:
+                    self.substantial_blocks += 1
 
-            remaining -= dur
+                remaining -= dur
 
-            if remaining > 0:
-                # forced break between chunks
-                finalize_current_work_block()
-                add_break(shortBreak)
-                work_since_last_break = 0
-            else:
-                # last chunk for this task: follow threshold logic
-                maybe_add_break(dur)
+                if remaining > 0:
+                    # forced break between chunks
+                    self.finalize_current_work_block()
+                    self.add_break(self.shortBreak)
+                    self.work_since_last_break = 0
+                else:
+                    # last chunk for this task: follow threshold logic
+                    self.maybe_add_break(dur)
+
+                part_index += 1
+
+    def finish(self) -> List[Any]:
+        # finalize any open work block
+        self.finalize_current_work_block()
+
+        # remove trailing break
+        if self.plan and self.block_type(self.plan[-1]) == "break":
+            self.plan.pop()
+
+        return self.plan
+
+    def iter_steps(self, quick_motivation: Optional[Task], quick_tasks: List[Task], normal_queue: deque) -> Iterator[bool]:
+        """
+        Steps 1-4 one unit at a time (the opening blocks, the micro batches, then each
+        normal task), yielding False after each unit and True once everything is placed
+        so callers can flush finalized blocks as they appear. Call finish() at the end.
+        """
+        if quick_motivation:
+            self.add_quick_motivation(quick_motivation)
+            yield False
+        if normal_queue:
+            self.add_anchor(normal_queue)
+            yield False
+        self.add_quick_batches(quick_tasks)
+        yield False
+        while normal_queue:
+            self.add_normal_tasks(deque((normal_queue.popleft(),)))
+            yield False
+        yield True
+
+    def block_type(self, block: Any) -> str:
+        return block["type"] if self.plain else block.type
+
+@lru_cache(maxsize=64)
+def scheduler_for(profile: SchedulingProfile) -> Type[PlanScheduler]:
+    """
+    PlanScheduler subclass with the profile's timings as class attributes. Built once
+    per distinct profile, so a custom profile costs the same per request as the default.
+    """
+    if profile == DEFAULT_PROFILE:
+        return PlanScheduler
+    return type(
+        f"PlanScheduler_{profile.blockLength}_{profile.shortBreak}_{profile.longBreak}",
+        (PlanScheduler,),
+        {
+            "blockLength": profile.blockLength,
+            "shortBreak": profile.shortBreak,
+            "longBreak": profile.longBreak,
+            "longBreakEvery": profile.longBreakEvery,
+            "CONTINUOUS_WORK_THRESHOLD": profile.continuousWorkThreshold,
+            "quickTaskMinutes": profile.quickTaskMinutes,
+        },
+    )
+
+def request_profile(requested, request: Optional[Request] = None) -> SchedulingProfile:
+    """Resolve the request's profile (name or timings), falling back to the tenant's profile."""
+    tenant = request.headers.get(TENANT_HEADER) if request is not None else None
+    try:
+        return profile_registry.resolve(requested, tenant)
+    except UnknownProfileError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+# -------------------------
+# Response caching
+# -------------------------
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+async def cached_plan_response(
+    request: Request, key: str, response_model: Type[BaseModel], build: Callable[..., Union[BaseModel, dict]], *args,
+    processes: bool = True, size: Optional[int] = None, blocks: int = 0,
+) -> Response:
+    """
+    Serve a plan for a deterministic input key: 304 when the client already has it,
+    the stored body on a cache hit, otherwise build(*args) on the plan executor
+    (inline for a small `size` and `blocks`), serialize and store it. Identical concurrent misses
+    share one build (X-Plan-Cache: coalesced).
+    """
+    etag = f'"{key}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    async def render() -> bytes:
+        return await run_planner(
+            render_built, build, response_model, *args, processes=processes, size=size, blocks=blocks
+        )
+
+    body, cache_status = await plan_cache.get_or_build(key, render)
+    return PlanJSONResponse(body, headers={"ETag": etag, "X-Plan-Cache": cache_status})
 
-            part_index += 1
+async def run_planner(
+    fn: Callable[..., Any], *args, processes: bool = True, size: Optional[int] = None, blocks: int = 0
+) -> Any:
+    """fn(*args) on the plan executor; 503 + Retry-After when its queue is full."""
+    try:
+        return await plan_executor.run(fn, *args, processes=processes, size=size, blocks=blocks)
+    except PlannerBusy as exc:
+        raise planner_busy(exc)
+
+def planner_busy(exc: PlannerBusy) -> HTTPException:
+    return HTTPException(
+        status_code=503, detail="Planner is busy, retry shortly", headers={"Retry-After": str(exc.retry_after)}
+    )
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is planned while it streams: it holds a plan executor
+    slot (taken by the route, see admit_planner) until the stream ends or fails.
+    """
+
+    def __init__(self, *args, release: Optional[Callable[[], None]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.release is not None:
+                self.release()
+
+async def admit_planner(size: Optional[int] = None, blocks: int = 0) -> Optional[Callable[[], None]]:
+    """
+    A plan executor slot for planning that streams instead of running through
+    run_planner; 503 + Retry-After when the queue is full. Returns the slot's release
+    callback, or None when `size` and `blocks` are small enough to need no slot.
+    """
+    try:
+        if not await plan_executor.acquire(size, blocks):
+            return None
+    except PlannerBusy as exc:
+        raise planner_busy(exc)
+    return plan_executor.release
+
+def work_blocks(tasks: List[Task], block_length: int) -> int:
+    """
+    Estimated work blocks of a plan for tasks (their minutes over the block length),
+    for is_small_plan. Only summed for a small task count: larger requests are never
+    small, and the sum would be O(n) work on the event loop.
+    """
+    if not is_small_plan(len(tasks)):
+        return 0
+    return sum(max(t.durationMinutes, 0) for t in tasks) // block_length
+
+async def cache_key_for(size: int, key_fn: Callable[..., str], *args, **params) -> str:
+    # hashing every task is real work for large payloads: keep it off the event loop
+    if is_small_plan(size):
+        return key_fn(*args, **params)
+    return await run_in_threadpool(key_fn, *args, **params)
+
+def render_built(build: Callable[..., Union[BaseModel, dict]], response_model: Type[BaseModel], *args) -> bytes:
+    """Build a plan and serialize it; runs on the plan executor (in a worker process with PLAN_EXECUTOR=process)."""
+    plan = build(*args)
+    with span("serialization"):
+        return render_plan(plan, response_model)
+
+def persist_plan(
+    background_tasks: BackgroundTasks, user: Optional[AuthUser], body: bytes, kind: str, key: str,
+    seed: Optional[int] = None,
+):
+    """Save a signed-in user's plan after the response is sent; a no-op without a database."""
+    if user is None or not database_configured():
+        return
+    # imported here so planner-only deployments never load the database stack
+    from services.plan_store import save_plan
+
+    background_tasks.add_task(save_plan, user, body, kind, key, seed)
+
+# -------------------------
+# Generate route
+# -------------------------
+@router.post("/generate", response_model=PlanGenerateResponse, response_class=PlanJSONResponse)
+async def generate_plan(
+    payload: PlanGenerateRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    preserve_order: bool = False,
+    user: Optional[AuthUser] = Depends(get_optional_user),
+):
+    profile = request_profile(payload.profile, request)
+    size = len(payload.tasks)
+    key = await cache_key_for(size, generate_cache_key, payload, preserve_order, profile)
+    response = await cached_plan_response(
+        request, key, PlanGenerateResponse, build_plan, payload, preserve_order, use_plain_blocks(), profile,
+        size=size, blocks=work_blocks(payload.tasks, profile.blockLength),
+    )
+    if response.status_code == 200:
+        persist_plan(background_tasks, user, response.body, "generate", key)
+    return response
+
+def generate_cache_key(payload: PlanGenerateRequest, preserve_order: bool, profile: SchedulingProfile) -> str:
+    # completed/deleted tasks never reach the scheduler, so they don't affect the key
+    return plan_cache_key(
+        "generate",
+        (t for t in payload.tasks if t.status not in (2, 3)),
+        preserve_order=preserve_order,
+        categories=category_registry.current().version,
+        profile=profile.model_dump(),
+        packing=payload.packing,
+    )
+
+def build_plan(
+    payload: PlanGenerateRequest,
+    preserve_order: bool = False,
+    plain: bool = False,
+    profile: Optional[SchedulingProfile] = None,
+) -> Union[PlanGenerateResponse, dict]:
+    """
+    Schedule the payload; with `plain=True` the plan comes back as a dict in the response
+    shape. `profile` defaults to the payload's own (no tenant lookup).
+    """
+    fields = schedule_plan(payload, preserve_order, plain, profile)
+    if plain:
+        return fields
+    with span("response_build"):
+        return PlanGenerateResponse(**fields)
+
+def schedule_plan(
+    payload: PlanGenerateRequest,
+    preserve_order: bool = False,
+    plain: bool = False,
+    profile: Optional[SchedulingProfile] = None,
+) -> dict:
+    scheduler_cls = scheduler_for(profile or profile_registry.resolve(payload.profile))
+    if is_small_plan(len(payload.tasks), work_blocks(payload.tasks, scheduler_cls.blockLength)):
+        return schedule_small(payload, preserve_order, plain, scheduler_cls)
+    prepared = prepare_tasks(payload, preserve_order, scheduler_cls.quickTaskMinutes)
+    if prepared is None:
+        return empty_plan()
+    quick_motivation, quick_tasks, normal_queue = prepared
 
-    # finalize any open work block
-    finalize_current_work_block()
+    # -----------------------
+    # Scheduling
+    # -----------------------
+    with span("scheduling"):
+        scheduler = scheduler_cls(plain=plain, packing=payload.packing)
+        if quick_motivation:
+            scheduler.add_quick_motivation(quick_motivation)
+        if normal_queue:
+            scheduler.add_anchor(normal_queue)
+        scheduler.add_quick_batches(quick_tasks)
+        scheduler.add_normal_tasks(normal_queue)
+        plan = scheduler.finish()
+
+    totalDuration, utilization = plan_totals(plan, scheduler_cls.blockLength, plain)
+
+    return {
+        "blocks": plan,
+        "totalDurationMinutes": totalDuration,
+        "totalBlocks": len(plan),
+        "quickTaskUsed": quick_motivation is not None,
+        "utilization": utilization,
+    }
+
+def empty_plan() -> dict:
+    return {"blocks": [], "totalDurationMinutes": 0, "totalBlocks": 0, "quickTaskUsed": False, "utilization": 0.0}
 
-    # remove trailing break
+# -------------------------
+# Small-input fast path
+# -------------------------
+def schedule_small(
+    payload: PlanGenerateRequest, preserve_order: bool, plain: bool, scheduler_cls: Type[PlanScheduler]
+) -> dict:
+    """
+    schedule_plan for a handful of tasks (see services.executor.SMALL_PLAN_MAX_TASKS):
+    the same plan and phase spans, prepared in one pass without vectorization checks.
+    Trivial shapes (nothing left, a single task, micro-tasks plus at most one normal
+    task) of at most SKELETON_MAX_BLOCKS blocks of work reuse a precomputed block
+    skeleton instead of running the scheduler.
+    """
+    quick_minutes = scheduler_cls.quickTaskMinutes
+    quick_tasks: List[Task] = []
+    normal_tasks: List[Task] = []
+    with span("filtering"):
+        for t in payload.tasks:
+            if t.status not in (2, 3):
+                (quick_tasks if t.durationMinutes <= quick_minutes else normal_tasks).append(t)
+    if not quick_tasks and not normal_tasks:
+        return empty_plan()
+
+    with span("sorting"):
+        quick_motivation: Optional[Task] = None
+        if quick_tasks:
+            quick_motivation = sort_tasks(quick_tasks)[0]
+            del quick_tasks[quick_tasks.index(quick_motivation)]
+        if not preserve_order:
+            normal_tasks = sort_tasks(normal_tasks)
+            quick_tasks = sort_tasks(quick_tasks)
+    with span("grouping"):
+        if len(normal_tasks) >= 3:
+            normal_tasks = apply_context_grouping(normal_tasks, category_registry.current())
+
+    quick_part = ([quick_motivation] if quick_motivation else []) + quick_tasks
+    minutes = sum(max(t.durationMinutes, 0) for t in quick_part + normal_tasks)
+    if len(normal_tasks) > 1 or minutes > SKELETON_MAX_BLOCKS * scheduler_cls.blockLength:
+        with span("scheduling"):
+            scheduler = scheduler_cls(plain=plain, packing=payload.packing)
+            if quick_motivation:
+                scheduler.add_quick_motivation(quick_motivation)
+            normal_queue = deque(normal_tasks)
+            if normal_queue:
+                scheduler.add_anchor(normal_queue)
+            scheduler.add_quick_batches(quick_tasks)
+            scheduler.add_normal_tasks(normal_queue)
+            plan = scheduler.finish()
+        totalDuration, utilization = plan_totals(plan, scheduler_cls.blockLength, plain)
+        return {
+            "blocks": plan,
+            "totalDurationMinutes": totalDuration,
+            "totalBlocks": len(plan),
+            "quickTaskUsed": quick_motivation is not None,
+            "utilization": utilization,
+        }
+
+    with span("scheduling"):
+        skeleton, totalDuration, utilization = plan_skeleton(
+            scheduler_cls,  # type: ignore[arg-type]  # classes hash by identity
+            payload.packing,
+            tuple(t.durationMinutes for t in quick_part),
+            normal_tasks[0].durationMinutes if normal_tasks else None,
+        )
+        ids = [t.id for t in quick_part + normal_tasks]
+        block: Callable[..., Any] = dict if plain else PlanBlock
+        split_info: Callable[..., Any] = dict if plain else SplitInfo
+        plan = [
+            block(
+                blockId=block_id,
+                type=kind,
+                durationMinutes=minutes,
+                tasks=[ids[i] for i in slots],
+                splitInfos=[split_info(originalTaskId=ids[i], part=part, totalParts=total) for i, part, total in splits]
+                if splits else None,
+            )
+            for block_id, kind, minutes, slots, splits in skeleton
+        ]
+    return {
+        "blocks": plan,
+        "totalDurationMinutes": totalDuration,
+        "totalBlocks": len(plan),
+        "quickTaskUsed": quick_motivation is not None,
+        "utilization": utilization,
+    }
+
+# skeletons are memoized per distinct shape: only short ones, so the memo stays small
+SKELETON_MAX_BLOCKS = 16
+
+@lru_cache(maxsize=256)
+def plan_skeleton(
+    scheduler_cls: Type[PlanScheduler], packing: str, quick_durations: tuple, normal_duration: Optional[int]
+) -> tuple:
+    """
+    The scheduler's plan for a trivial input shape, with task ids replaced by their
+    position in [quick motivation, *quick tasks, normal task]. The scheduler only reads
+    ids and durations, so the plan for any tasks of these durations is the skeleton
+    with their ids filled in. (Packing counters only count the run that built it.)
+    """
+    durations = list(quick_durations) + ([normal_duration] if normal_duration is not None else [])
+    placeholders = [
+        Task(id=str(i), name="", priority=0, difficulty=0, durationMinutes=d, status=0) for i, d in enumerate(durations)
+    ]
+    quick = placeholders[:len(quick_durations)]
+    normal_queue = deque(placeholders[len(quick_durations):])
+    scheduler = scheduler_cls(plain=True, packing=packing)
+    if quick:
+        scheduler.add_quick_motivation(quick[0])
+    if normal_queue:
+        scheduler.add_anchor(normal_queue)
+    scheduler.add_quick_batches(quick[1:])
+    scheduler.add_normal_tasks(normal_queue)
+    plan = scheduler.finish()
+    totalDuration, utilization = plan_totals(plan, scheduler_cls.blockLength, plain=True)
+    skeleton = tuple(
+        (
+            b["blockId"], b["type"], b["durationMinutes"], tuple(int(tid) for tid in b["tasks"]),
+            tuple((int(si["originalTaskId"]), si["part"], si["totalParts"]) for si in b["splitInfos"] or ()),
+        )
+        for b in plan
+    )
+    return skeleton, totalDuration, utilization
+
+def plan_totals(plan: Sequence[Any], block_length: int, plain: bool = False) -> tuple:
+    """(totalDurationMinutes, utilization) of a finished plan."""
+    total = work = work_blocks = 0
+    for b in plan:
+        kind, minutes = (b["type"], b["durationMinutes"]) if plain else (b.type, b.durationMinutes)
+        total += minutes
+        if kind == "work":
+            work += minutes
+            work_blocks += 1
+    return total, plan_utilization(work, work_blocks, block_length)
+
+def prepare_tasks(
+    payload: PlanGenerateRequest, preserve_order: bool = False, quick_minutes: int = QUICK_TASK_MINUTES
+):
+    """
+    Filter, sort and group the payload for scheduling. Returns (quick_motivation,
+    quick_tasks, normal_queue), or None when there is nothing to schedule.
+    """
+
+    quick_motivation: Optional[Task]
+    quick_tasks: List[Task]
+    normal_tasks: Sequence[Union[Task, TaskChunk]]
+    arrays = pack(payload.tasks) if should_vectorize(payload.tasks) else None
+    if arrays is not None:
+        # same filtering and ordering as below, as array operations
+        with span("sorting"):
+            quick_motivation, quick_tasks, normal_tasks = partition_sorted(arrays, quick_minutes, preserve_order)
+        if quick_motivation is None and not normal_tasks:
+            return None
+    else:
+        # -----------------------
+        # 1) Prepare tasks: filter completed/deleted
+        # -----------------------
+        with span("filtering"):
+            tasks: List[Task] = [t for t in payload.tasks if t.status not in (2, 3)]
+            if not tasks:
+                return None
+
+            # split quick vs normal
+            quick_tasks = [t for t in tasks if is_quick_task(t, quick_minutes)]
+            normal_tasks = [t for t in tasks if not is_quick_task(t, quick_minutes)]
+
+        with span("sorting"):
+            # quick motivation selection
+            quick_motivation = None
+            if quick_tasks:
+                quick_motivation = sort_tasks(quick_tasks)[0]
+                del quick_tasks[quick_tasks.index(quick_motivation)]
+
+            # sorting
+            if not preserve_order:
+                # sort_tasks expects List[Task]; normal_tasks currently contains Task only at this point
+                normal_tasks = sort_tasks([t for t in normal_tasks if isinstance(t, Task)])
+                quick_tasks = sort_tasks(quick_tasks)
+
+    # context grouping
+    with span("grouping"):
+        categories = category_registry.current()
+        # apply_context_grouping expects Task list; operate on the pure-Task list and then rebuild normal_tasks
+        task_only = [t for t in normal_tasks if isinstance(t, Task)]
+        grouped = apply_context_grouping(task_only, categories)
+        # rebuild the normal queue from grouped tasks (there are no TaskChunk yet at this point)
+        # deque: the anchor leftover is pushed back to the front, everything else pops from it
+        normal_queue: deque = deque(grouped)
+
+    return quick_motivation, quick_tasks, normal_queue
+
+# -----------------------
+# Streaming generate route
+# -----------------------
+@router.post("/generate/stream")
+async def generate_plan_stream(
+    payload: PlanGenerateRequest,
+    request: Request,
+    preserve_order: bool = False,
+    stream_format: Literal["ndjson", "sse"] = Query("ndjson", alias="format"),
+):
+    """
+    Same plan as /plan/generate, sent block by block as the scheduler finalizes them.
+
+    Events are ("block", PlanBlock), then ("end", {totalDurationMinutes, totalBlocks,
+    quickTaskUsed, utilization}), or ("error", {detail}) if planning fails part way. NDJSON lines
+    are {"event", "data"}; with format=sse they are Server-Sent Events.
+    """
+    profile = request_profile(payload.profile, request)
+    events = stream_plan_events(payload, preserve_order, profile)
+    release = await admit_planner(len(payload.tasks), work_blocks(payload.tasks, profile.blockLength))
+    if stream_format == "sse":
+        body = (b"event: " + name.encode() + b"\ndata: " + dumps(data) + b"\n\n" for name, data in events)
+        return AdmittedStreamingResponse(
+            body, media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            release=release,
+        )
+    body = (dumps({"event": name, "data": data}) + b"\n" for name, data in events)
+    return AdmittedStreamingResponse(body, media_type="application/x-ndjson", release=release)
+
+def stream_plan_events(
+    payload: PlanGenerateRequest, preserve_order: bool = False, profile: SchedulingProfile = DEFAULT_PROFILE
+) -> Iterator[tuple]:
+    scheduler_cls = scheduler_for(profile)
+    total_duration = 0
+    work_minutes = work_blocks = 0
+    sent = 0
+    quick_task_used = False
+    try:
+        prepared = prepare_tasks(payload, preserve_order, scheduler_cls.quickTaskMinutes)
+        if prepared is not None:
+            quick_motivation, quick_tasks, normal_queue = prepared
+            quick_task_used = quick_motivation is not None
+            scheduler = scheduler_cls(plain=True, packing=payload.packing)
+            plan = scheduler.plan
+            for done in scheduler.iter_steps(quick_motivation, quick_tasks, normal_queue):
+                limit = len(plan)
+                if done:
+                    scheduler.finish()
+                    limit = len(plan)
+                elif plan and plan[-1]["type"] == "break":
+                    # one block of lookahead: finish() drops a trailing break, so a break
+                    # is only sent once something follows it
+                    limit -= 1
+                while sent < limit:
+                    block = plan[sent]
+                    sent += 1
+                    total_duration += block["durationMinutes"]
+                    if block["type"] == "work":
+                        work_minutes += block["durationMinutes"]
+                        work_blocks += 1
+                    yield "block", block
+    except Exception:
+        logger.exception("Streaming plan generation failed after %d blocks", sent)
+        yield "error", {"detail": "Plan generation failed"}
+        return
+
+    yield "end", {
+        "totalDurationMinutes": total_duration,
+        "totalBlocks": sent,
+        "quickTaskUsed": quick_task_used,
+        "utilization": plan_utilization(work_minutes, work_blocks, scheduler_cls.blockLength),
+    }
+
+# -----------------------
+# Batch generate route
+# -----------------------
+@router.post("/generate/batch")
+async def generate_plan_batch(payload: PlanBatchGenerateRequest, request: Request, preserve_order: bool = False):
+    """
+    Generate plans for many independent task lists in one request.
+
+    Items are scheduled across the worker pool and streamed back in order as NDJSON,
+    one line per item: {"index", "ok", "result"} or {"index", "ok", "error"}. Items
+    without a profile of their own use the tenant's. The whole batch takes one plan
+    executor slot while it streams.
+    """
+    items = payload.items
+    profile = request_profile(None, request)
+
+    def stream() -> Iterator[bytes]:
+        for index, outcome in enumerate(run_batch(items, preserve_order, profile)):
+            yield dumps({"index": index, **outcome}) + b"\n"
+
+    release = await admit_planner()
+    return AdmittedStreamingResponse(stream(), media_type="application/x-ndjson", release=release)
+
+def run_batch(items: List[dict], preserve_order: bool, profile: SchedulingProfile = DEFAULT_PROFILE) -> Iterator[dict]:
+    pool = get_process_pool()
+    if pool is None or len(items) < 2:
+        for raw in items:
+            yield generate_batch_item(raw, preserve_order, profile)
+        return
+
+    done = 0
+    try:
+        # map() submits everything up front and yields results in submission order
+        chunksize = max(1, len(items) // (PLAN_WORKERS * 4))
+        for outcome in pool.map(
+            generate_batch_item, items, [preserve_order] * len(items), [profile] * len(items), chunksize=chunksize
+        ):
+            done += 1
+            yield outcome
+    except Exception:
+        logger.exception("Batch planning pool failed after %d of %d items", done, len(items))
+        for _ in range(done, len(items)):
+            yield {"ok": False, "error": {"type": "internal", "detail": "Plan generation failed"}}
+
+def generate_batch_item(raw: dict, preserve_order: bool, profile: SchedulingProfile = DEFAULT_PROFILE) -> dict:
+    """Runs in a worker process: validate one payload and plan it."""
+    try:
+        request = PlanGenerateRequest.model_validate(raw)
+        if request.profile is not None:
+            profile = profile_registry.resolve(request.profile)
+    except ValidationError as exc:
+        return {"ok": False, "error": {"type": "validation", "detail": json.loads(exc.json(include_url=False))}}
+    except UnknownProfileError as exc:
+        return {"ok": False, "error": {"type": "validation", "detail": str(exc)}}
+
+    try:
+        # plain dicts: nothing to dump, and they pickle back from the workers cheaply
+        result = build_plan(request, preserve_order=preserve_order, plain=True, profile=profile)
+    except Exception:
+        logger.exception("Batch item planning failed")
+        return {"ok": False, "error": {"type": "internal", "detail": "Plan generation failed"}}
+    return {"ok": True, "result": result}
+
+# -----------------------
+# Patch route (incremental update of an existing plan)
+# -----------------------
+@router.post("/patch", response_model=PlanPatchResponse)
+async def patch_plan(payload: PlanPatchRequest, request: Request):
+    """
+    Apply task changes to a previous plan, rescheduling only from the first affected
+    block onward. Earlier blocks keep their blockIds, and the break accounting is
+    carried over from them. Added tasks go after the remaining work. Changes that reach
+    the opening blocks (quick motivation / anchor) rebuild the whole plan.
+    """
+    profile = request_profile(payload.profile, request)
+    try:
+        return await run_planner(
+            build_patched_plan, payload, profile,
+            size=len(payload.tasks), blocks=work_blocks(payload.tasks, profile.blockLength),
+        )
+    except UnknownPlanTask as exc:
+        raise HTTPException(status_code=422, detail=f"Plan references unknown task {exc}")
+
+class UnknownPlanTask(Exception):
+    """A patched plan's prefix references a task missing from `tasks` (HTTPException doesn't pickle)."""
+
+def build_patched_plan(payload: PlanPatchRequest, profile: SchedulingProfile) -> PlanPatchResponse:
+    """Runs on the plan executor: the /plan/patch response for payload."""
+    scheduler_cls = scheduler_for(profile)
+    blocks = payload.plan.blocks
+    prev_tasks = {t.id: t for t in payload.tasks}
+
+    new_tasks = dict(prev_tasks)
+    touched = {}  # ordered set of changed task ids
+    for change in payload.changes:
+        tid = change.target_id
+        touched[tid] = True
+        if change.op in ("complete", "delete"):
+            new_tasks.pop(tid, None)
+        elif change.task is not None:  # always set for add/update (TaskChange.check_target)
+            new_tasks[tid] = change.task
+
+    # first block index of every task still present in the plan
+    first_index: Dict[str, int] = {}
+    for i, block in enumerate(blocks):
+        for tid in block.tasks:
+            first_index.setdefault(tid, i)
+
+    current_index = 0
+    if payload.currentBlockId is not None:
+        current_index = next((i for i, b in enumerate(blocks) if b.blockId >= payload.currentBlockId), len(blocks))
+
+    # tasks that were never scheduled (new, or previously completed) join at the end
+    added = [new_tasks[tid] for tid in touched if tid in new_tasks and tid not in first_index]
+    start = len(blocks)
+    for tid in touched:
+        if tid in first_index:
+            start = min(start, max(first_index[tid], current_index))
+    if added:
+        start = min(start, max(len(blocks) - 1, current_index))
+    # breaks hold no tasks: one at the start stays in the prefix, or the break the
+    # scheduler put there (e.g. between two chunks of a task) would be lost
+    while start < len(blocks) and blocks[start].type == "break":
+        start += 1
+
+    if start >= len(blocks) and not added:
+        unchanged = payload.plan.model_dump()
+        unchanged["utilization"] = plan_totals(blocks, scheduler_cls.blockLength)[1]
+        return PlanPatchResponse(**unchanged, rescheduledFromBlockId=None)
+
+    anchor_index = next((i for i, b in enumerate(blocks) if b.splitInfos), 0)
+    if not blocks or start <= anchor_index:
+        tasks = [new_tasks[t.id] for t in payload.tasks if t.id in new_tasks] + \
+            [t for t in added if t.id not in prev_tasks]
+        rebuilt = cast(PlanGenerateResponse, build_plan(
+            PlanGenerateRequest(tasks=tasks), preserve_order=payload.preserveOrder, profile=profile
+        ))
+        return PlanPatchResponse(**rebuilt.model_dump(), rescheduledFromBlockId=1 if rebuilt.blocks else None)
+
+    prefix = blocks[:start]
+    try:
+        work_since_last_break, substantial_blocks = replay_break_accounting(
+            prefix, prev_tasks, payload.plan.quickTaskUsed, scheduler_cls
+        )
+    except KeyError as exc:
+        raise UnknownPlanTask(str(exc))
+
+    next_block_id = blocks[start].blockId if start < len(blocks) else blocks[-1].blockId + 1
+    scheduler = scheduler_cls(
+        blockId=next_block_id,
+        work_since_last_break=work_since_last_break,
+        substantial_blocks=substantial_blocks,
+    )
+
+    # remaining work in previous plan order, then the added tasks
+    items: List[Union[Task, TaskChunk]] = []
+    for tid, part in suffix_units(blocks[start:]):
+        task = new_tasks.get(tid)
+        if task is None or task.status in (2, 3):
+            continue
+        if part is None or part == 1:
+            items.append(task)
+            continue
+        remaining = task.durationMinutes - (part - 1) * scheduler.blockLength
+        if remaining > 0:
+            total_parts = part - 1 + math.ceil(remaining / scheduler.blockLength)
+            items.append(TaskChunk(task=task, remaining=remaining, total_parts=total_parts, next_part=part))
+    items.extend(sort_tasks([t for t in added if t.status not in (2, 3)]))
+
+    # consecutive quick tasks are batched like step 3, everything else goes through step 4
+    quick_run: List[Task] = []
+    for item in items:
+        if isinstance(item, Task) and is_quick_task(item, scheduler_cls.quickTaskMinutes):
+            quick_run.append(item)
+            continue
+        if quick_run:
+            scheduler.add_quick_batches(quick_run)
+            quick_run = []
+        scheduler.add_normal_tasks(deque([item]))
+    if quick_run:
+        scheduler.add_quick_batches(quick_run)
+
+    plan = prefix + scheduler.finish()
     if plan and plan[-1].type == "break":
         plan.pop()
 
-    totalDuration = sum(b.durationMinutes for b in plan)
-
-    return PlanGenerateResponse(
+    total_duration, utilization = plan_totals(plan, scheduler_cls.blockLength)
+    return PlanPatchResponse(
         blocks=plan,
-        totalDurationMinutes=totalDuration,
+        totalDurationMinutes=total_duration,
         totalBlocks=len(plan),
-        quickTaskUsed=quick_task_used,
+        quickTaskUsed=payload.plan.quickTaskUsed,
+        utilization=utilization,
+        rescheduledFromBlockId=next_block_id,
     )
 
+def suffix_units(blocks: List[PlanBlock]) -> Iterator[tuple]:
+    """(taskId, first part or None for unsplit quick tasks) in order of first appearance."""
+    seen = set()
+    for block in blocks:
+        if block.type != "work":
+            continue
+        parts = {si.originalTaskId: si.part for si in (block.splitInfos or [])}
+        for tid in block.tasks:
+            if tid not in seen:
+                seen.add(tid)
+                yield tid, parts.get(tid)
+
+def replay_break_accounting(
+    prefix: List[PlanBlock], tasks_by_id: dict, quick_task_used: bool,
+    scheduler_cls: Type[PlanScheduler] = PlanScheduler,
+):
+    """
+    Rebuild (work_since_last_break, substantial_blocks) as PlanScheduler had them after
+    the prefix. Mirrors how each step feeds maybe_add_break: the quick motivation and
+    anchor count once, each micro batch counts once, and the last chunk of a step-4
+    task counts twice (once in the loop, once in maybe_add_break).
+    """
+    blockLength = scheduler_cls.blockLength
+    work_since_last_break = 0
+    substantial_blocks = 0
+    motivation_seen = not quick_task_used
+    anchor_seen = False
+
+    def count(duration: int, times: int = 1):
+        nonlocal work_since_last_break, substantial_blocks
+        work_since_last_break += duration * times
+        if duration >= 20:
+            substantial_blocks += times
+
+    for block in prefix:
+        if block.type == "break":
+            work_since_last_break = 0
+            continue
+
+        splits = {si.originalTaskId: si for si in (block.splitInfos or [])}
+        batch_minutes = 0
+        for tid in block.tasks:
+            si = splits.get(tid)
+            if si is None:
+                minutes = tasks_by_id[tid].durationMinutes
+                if not motivation_seen:
+                    motivation_seen = True
+                    count(minutes)
+                else:
+                    batch_minutes += minutes
+                continue
+
+            if si.part < si.totalParts:
+                minutes = blockLength
+            else:
+                minutes = tasks_by_id[tid].durationMinutes - (si.totalParts - 1) * blockLength
+            if not anchor_seen:
+                anchor_seen = True
+                count(minutes)
+            else:
+                count(minutes, 2 if si.part == si.totalParts else 1)
+
+        if batch_minutes:
+            count(batch_minutes)
+
+    return work_since_last_break, substantial_blocks
+
 # -----------------------
-# Regenerate route (unchanged heuristics, uses generate_plan)
+# Regenerate route (unchanged heuristics, uses build_plan)
 # -----------------------
-@router.post("/regenerate", response_model=PlanRegenerateResponse)
-def regenerate_plan(payload: PlanRegenerateRequest):
+@router.post("/regenerate", response_model=PlanRegenerateResponse, response_class=PlanJSONResponse)
+async def regenerate_plan(
+    payload: PlanRegenerateRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    user: Optional[AuthUser] = Depends(get_optional_user),
+):
+    plain = use_plain_blocks()
+    profile = request_profile(payload.profile, request)
+    size = len(payload.tasks)
+    blocks = work_blocks(payload.tasks, profile.blockLength)
+    if payload.seed is None:
+        # a fresh random seed each time: nothing to cache. It is drawn here so the
+        # plan can be built elsewhere and still be saved under its seed.
+        seed = random.randint(1, 999999)
+        body = await run_planner(
+            render_built, build_regenerated_plan, PlanRegenerateResponse,
+            payload.model_copy(update={"seed": seed}), plain, profile, size=size, blocks=blocks,
+        )
+        if user is not None:
+            key = await cache_key_for(size, regenerate_cache_key, payload, seed, profile)
+            persist_plan(background_tasks, user, body, "regenerate", key, seed)
+        return PlanJSONResponse(body)
+
+    key = await cache_key_for(size, regenerate_cache_key, payload, payload.seed, profile)
+    response = await cached_plan_response(
+        request, key, PlanRegenerateResponse, build_regenerated_plan, payload, plain, profile,
+        size=size, blocks=blocks,
+    )
+    if response.status_code == 200:
+        persist_plan(background_tasks, user, response.body, "regenerate", key, payload.seed)
+    return response
+
+def regenerate_cache_key(
+    payload: PlanRegenerateRequest, seed: int, profile: SchedulingProfile, route: str = "regenerate", **params
+) -> str:
+    # every task (even completed ones) draws from the RNG, so all of them go in the key
+    return plan_cache_key(
+        route,
+        payload.tasks,
+        **params,
+        seed=seed,
+        randomness=payload.randomness,
+        allowDifferentQuickTask=payload.allowDifferentQuickTask,
+        allowReverseAnchor=payload.allowReverseAnchor,
+        categories=category_registry.current().version,
+        profile=profile.model_dump(),
+    )
+
+def build_regenerated_plan(
+    payload: PlanRegenerateRequest, plain: bool = False, profile: Optional[SchedulingProfile] = None
+) -> Union[PlanRegenerateResponse, dict]:
+    profile = profile or profile_registry.resolve(payload.profile)
+    quick_minutes = profile.quickTaskMinutes
     seed = payload.seed if payload.seed is not None else random.randint(1, 999999)
-    random.seed(seed)
+    # per-request generator: seeding the module RNG is shared across threads
+    rng = random.Random(seed)
 
     tasks = payload.tasks[:]  # shallow copy
     randomness = payload.randomness
     explanation: List[str] = []
 
-    categories = load_categories()
+    categories = category_registry.current()
 
     def noisy_score(task: Task):
         base = compute_score(task)
-        noise = random.uniform(-randomness, randomness) * base
+        noise = rng.uniform(-randomness, randomness) * base
         return base + noise
 
-    tasks = sorted(tasks, key=lambda t: noisy_score(t), reverse=True)
-    explanation.append("Applied proportional noisy scoring to reorder tasks.")
-
-    if payload.allowDifferentQuickTask:
-        quick_candidates = [t for t in tasks if is_quick_task(t)]
-        if len(quick_candidates) > 1:
-            random.shuffle(quick_candidates)
-            explanation.append("Shuffled quick-task candidates for variation.")
-
-    def random_category_swaps(task_list: List[Task]) -> List[Task]:
-        new_list = task_list[:]
-        for i in range(len(new_list) - 1):
-            catA = get_task_category(new_list[i], categories)
-            catB = get_task_category(new_list[i + 1], categories)
-            if catA == catB and random.random() < (randomness * 0.5):
-                new_list[i], new_list[i + 1] = new_list[i + 1], new_list[i]
-                explanation.append(f"Swapped two '{catA}' tasks for variation.")
-        return new_list
-
-    tasks = random_category_swaps(tasks)
-
-    quick_ts = [t for t in tasks if is_quick_task(t)]
-    if len(quick_ts) > 1:
-        random.shuffle(quick_ts)
-        explanation.append("Shuffled micro-task order to vary batch arrangement.")
-
-    # reinsert shuffled quick tasks
-    shuffled_tasks = []
-    q_index = 0
-    for t in tasks:
-        if is_quick_task(t):
-            shuffled_tasks.append(quick_ts[q_index])
-            q_index += 1
+    with span("variation"):
+        arrays = pack(tasks) if should_vectorize(tasks) else None
+        if arrays is not None:
+            tasks = noisy_order(arrays, rng, randomness)
         else:
-            shuffled_tasks.append(t)
-    tasks = shuffled_tasks
-
-    regenerated_plan = generate_plan(PlanGenerateRequest(tasks=tasks), preserve_order=True)
-
-    return PlanRegenerateResponse(
-        blocks=regenerated_plan.blocks,
-        totalDurationMinutes=regenerated_plan.totalDurationMinutes,
-        totalBlocks=regenerated_plan.totalBlocks,
-        quickTaskUsed=regenerated_plan.quickTaskUsed,
-        seedUsed=seed,
-        variationExplanation=", ".join(explanation),
+            tasks = sorted(tasks, key=lambda t: noisy_score(t), reverse=True)
+        explanation.append("Applied proportional noisy scoring to reorder tasks.")
+
+        if payload.allowDifferentQuickTask:
+            quick_candidates = [t for t in tasks if is_quick_task(t, quick_minutes)]
+            if len(quick_candidates) > 1:
+                rng.shuffle(quick_candidates)
+                explanation.append("Shuffled quick-task candidates for variation.")
+
+        def random_category_swaps(task_list: List[Task]) -> List[Task]:
+            new_list = task_list[:]
+            # classify once per task; swaps move the categories along with the tasks
+            cats = [get_task_category(t, categories) for t in new_list]
+            for i in range(len(new_list) - 1):
+                catA = cats[i]
+                catB = cats[i + 1]
+                if catA == catB and rng.random() < (randomness * 0.5):
+                    new_list[i], new_list[i + 1] = new_list[i + 1], new_list[i]
+                    cats[i], cats[i + 1] = cats[i + 1], cats[i]
+                    explanation.append(f"Swapped two '{catA}' tasks for variation.")
+            return new_list
+
+        tasks = random_category_swaps(tasks)
+
+        quick_ts = [t for t in tasks if is_quick_task(t, quick_minutes)]
+        if len(quick_ts) > 1:
+            rng.shuffle(quick_ts)
+            explanation.append("Shuffled micro-task order to vary batch arrangement.")
+
+        # reinsert shuffled quick tasks
+        shuffled_tasks = []
+        q_index = 0
+        for t in tasks:
+            if is_quick_task(t, quick_minutes):
+                shuffled_tasks.append(quick_ts[q_index])
+                q_index += 1
+            else:
+                shuffled_tasks.append(t)
+        tasks = shuffled_tasks
+
+    fields = schedule_plan(PlanGenerateRequest(tasks=tasks), preserve_order=True, plain=plain, profile=profile)
+    fields["seedUsed"] = seed
+    fields["variationExplanation"] = ", ".join(explanation)
+    if plain:
+        return fields
+    with span("response_build"):
+        return PlanRegenerateResponse(**fields)
+
+# -----------------------
+# Regenerate candidates route
+# -----------------------
+@router.post("/regenerate/candidates", response_model=PlanCandidatesResponse, response_class=PlanJSONResponse)
+async def regenerate_candidates(payload: PlanCandidatesRequest, request: Request):
+    """
+    Several regenerate variations in one request, from seeds derived from `seed`
+    (candidate 0 uses `seed` itself, so it matches /plan/regenerate with that seed).
+    Candidates are built across the worker pool, scored with plan_quality and returned
+    best first, optionally cut to the top `topK`.
+    """
+    base_seed = payload.seed if payload.seed is not None else random.randint(1, 999999)
+    profile = request_profile(payload.profile, request)
+
+    # the fan-out already uses the process pool, so this one is admitted but runs on a thread
+    if payload.seed is None:
+        body = await run_planner(
+            render_built, build_candidates, PlanCandidatesResponse, payload, base_seed, profile, processes=False
+        )
+        return PlanJSONResponse(body)
+
+    key = await cache_key_for(
+        len(payload.tasks), regenerate_cache_key,
+        payload, base_seed, profile, "regenerate_candidates", candidates=payload.candidates, topK=payload.topK,
+    )
+    return await cached_plan_response(
+        request, key, PlanCandidatesResponse, build_candidates, payload, base_seed, profile, processes=False
     )
 
+def build_candidates(payload: PlanCandidatesRequest, base_seed: int, profile: SchedulingProfile) -> dict:
+    ranked = sorted(run_candidates(payload, derive_seeds(base_seed, payload.candidates), profile),
+                    key=lambda c: c["quality"]["score"], reverse=True)
+    return {"baseSeed": base_seed, "candidates": ranked[:payload.topK]}
+
+def derive_seeds(base_seed: int, count: int) -> List[int]:
+    """`count` distinct seeds in regenerate's 1..999999 range, starting with base_seed."""
+    seeds = [base_seed]
+    rng = random.Random(base_seed)
+    while len(seeds) < count:
+        seed = rng.randint(1, 999999)
+        if seed not in seeds:
+            seeds.append(seed)
+    return seeds
+
+def run_candidates(payload: PlanCandidatesRequest, seeds: List[int], profile: SchedulingProfile) -> List[dict]:
+    pool = get_process_pool()
+    if pool is not None and len(seeds) > 1:
+        try:
+            return list(pool.map(build_candidate, [payload] * len(seeds), seeds, [profile] * len(seeds)))
+        except Exception:
+            logger.exception("Candidate pool failed; building %d candidates inline", len(seeds))
+    return [build_candidate(payload, seed, profile) for seed in seeds]
+
+def build_candidate(payload: PlanRegenerateRequest, seed: int, profile: SchedulingProfile) -> dict:
+    """Runs in a worker process: one seeded variation plus its quality score."""
+    candidate = cast(
+        dict, build_regenerated_plan(payload.model_copy(update={"seed": seed}), plain=True, profile=profile)
+    )
+    candidate["quality"] = plan_quality(candidate, payload.tasks, category_registry.current())
+    return candidate
+
 # -----------------------
 # Helper functions (unchanged)
 # -----------------------
@@ -418,8 +1324,8 @@ def compute_score(task: Task):
 def sort_tasks(tasks: List[Task]) -> List[Task]:
     return sorted(tasks, key=lambda t: (compute_score(t), t.durationMinutes), reverse=True)
 
-def is_quick_task(task: Task):
-    return task.durationMinutes <= 10
+def is_quick_task(task: Task, quick_minutes: int = QUICK_TASK_MINUTES):
+    return task.durationMinutes <= quick_minutes
 
 def append_break_block(plan, blockId, duration):
     plan.append(PlanBlock(blockId=blockId, type="break", durationMinutes=duration, tasks=[], splitInfos=None))
@@ -438,41 +1344,25 @@ def split_task(task: Task, chunk: int):
         status=task.status,
     )
 
-def get_task_category(task: Task, categories):
-    text = (task.name + " " + (task.description or "")).lower()
-    tokens = re.findall(r"\w+", text)
+def get_task_category(task: Task, categories: CategoryClassifier):
+    return category_cache.classify(task.name, task.description, categories)
 
-    if not categories:
-        return "other"
-
-    scores = {cat: 0 for cat in categories.keys()}
-    for token in tokens:
-        for cat, keywords in categories.items():
-            if token in keywords:
-                scores[cat] += 1
-
-    best_cat = max(scores, key=scores.get)
-    if scores[best_cat] == 0:
-        return "other"
-    return best_cat
-
-def apply_context_grouping(tasks: List[Task], categories):
+def apply_context_grouping(tasks: List[Task], categories: CategoryClassifier):
     if not categories:
         return tasks
     if len(tasks) < 3:
         return tasks
 
     new_tasks = tasks[:]
+    # classify once per task; swaps move the categories along with the tasks
+    cats = [get_task_category(t, categories) for t in new_tasks]
     for i in range(len(new_tasks) - 2):
-        current = new_tasks[i]
-        next1 = new_tasks[i + 1]
-        next2 = new_tasks[i + 2]
-
-        cat0 = get_task_category(current, categories)
-        cat1 = get_task_category(next1, categories)
-        cat2 = get_task_category(next2, categories)
+        cat0 = cats[i]
+        cat1 = cats[i + 1]
+        cat2 = cats[i + 2]
 
         if cat0 == cat2 and cat0 != cat1:
             new_tasks[i + 1], new_tasks[i + 2] = new_tasks[i + 2], new_tasks[i + 1]
+            cats[i + 1], cats[i + 2] = cats[i + 2], cats[i + 1]
 
     return new_tasks
\ No newline at end of file
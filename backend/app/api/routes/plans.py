@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.auth import AuthUser, get_current_user
+from core.database import get_session
+from models import Plan
+from models.plan import PlanBlock, SavedPlan, SavedPlanSummary
+from services.plan_codec import PlanView
+
+router = APIRouter(prefix="/plans", tags=["plan"])
+
+def summary(row: Plan, view: PlanView) -> dict:
+    return {
+        "id": row.id,
+        "kind": row.kind,
+        "createdAt": row.created_at,
+        "seed": row.seed,
+        "totalDurationMinutes": view.totalDurationMinutes,
+        "totalBlocks": view.totalBlocks,
+        "quickTaskUsed": view.quickTaskUsed,
+    }
+
+async def load_plan(session: AsyncSession, user_id: str, plan_id: int) -> Plan:
+    row = (await session.exec(
+        select(Plan).where(Plan.id == plan_id, Plan.user_id == user_id, Plan.blob != None)  # noqa: E711
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    return row
+
+@router.get("/latest", response_model=SavedPlanSummary)
+async def get_latest_plan(
+    user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """Summary of the user's most recent plan (header only, no blocks decoded)."""
+    row = (await session.exec(
+        select(Plan)
+        .where(Plan.user_id == user.id, Plan.blob != None)  # noqa: E711
+        .order_by(Plan.created_at.desc())
+        .limit(1)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="No saved plan")
+    return summary(row, PlanView(row.blob))
+
+@router.get("/{plan_id}", response_model=SavedPlan)
+async def get_plan(
+    plan_id: int,
+    user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    row = await load_plan(session, user.id, plan_id)
+    view = PlanView(row.blob)
+    return {**summary(row, view), "blocks": view.blocks()}
+
+@router.get("/{plan_id}/blocks/{block_id}", response_model=PlanBlock)
+async def get_plan_block(
+    plan_id: int,
+    block_id: int,
+    user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """A single block, decoded without touching the rest of the plan."""
+    row = await load_plan(session, user.id, plan_id)
+    block = PlanView(row.blob).find_block(block_id)
+    if block is None:
+        raise HTTPException(status_code=404, detail="Block not found")
+    return block
@@ -1,14 +1,75 @@
-from fastapi import APIRouter
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.auth import AuthUser, get_current_user
+from core.database import get_session
+from models import Session
+from models.session import SessionRead
+from services.users import ensure_user
 
 router = APIRouter(prefix="/session", tags=["session"])
 
-@router.get("")
-def get_session():
-    """Return mock session data."""
-    return {
-        "session_id": "mock-session-789",
-        "status": "active",
-        "current_step": 1,
-        "total_steps": 3,
-        "progress": 33,
-    }
\ No newline at end of file
+def to_read(row: Session) -> SessionRead:
+    return SessionRead(
+        id=row.id,
+        status="active" if row.end_time is None else "ended",
+        start_time=row.start_time,
+        end_time=row.end_time,
+    )
+
+async def get_active_session(session: AsyncSession, user_id: str):
+    result = await session.exec(
+        select(Session)
+        .where(Session.user_id == user_id, Session.end_time == None)  # noqa: E711
+        .order_by(Session.start_time.desc())
+        .limit(1)
+    )
+    return result.first()
+
+@router.get("", response_model=SessionRead)
+async def get_current_session(
+    user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """Return the user's active focus session."""
+    row = await get_active_session(session, user.id)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No active session")
+    return to_read(row)
+
+@router.post("", response_model=SessionRead, status_code=status.HTTP_201_CREATED)
+async def start_session(
+    user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """Start a focus session, ending any session still open."""
+    await ensure_user(session, user)
+    now = datetime.utcnow()
+    previous = await get_active_session(session, user.id)
+    if previous is not None:
+        previous.end_time = now
+        session.add(previous)
+
+    row = Session(user_id=user.id, start_time=now)
+    session.add(row)
+    await session.commit()
+    await session.refresh(row)
+    return to_read(row)
+
+@router.post("/end", response_model=SessionRead)
+async def end_session(
+    user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """End the user's active focus session."""
+    row = await get_active_session(session, user.id)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No active session")
+    row.end_time = datetime.utcnow()
+    session.add(row)
+    await session.commit()
+    await session.refresh(row)
+    return to_read(row)
@@ -1,17 +1,156 @@
-from fastapi import APIRouter
+from typing import Dict, Optional, Set
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel import delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.auth import AuthUser, get_current_user
+from core.database import dialect_insert, get_session
+from models import Task
+from models.task import (
+    BulkStatus,
+    TaskBulkRequest,
+    TaskBulkResponse,
+    TaskBulkResult,
+    TaskCreate,
+    TaskPage,
+    TaskRead,
+)
+from services.users import ensure_user
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
-@router.get("")
-def get_tasks():
-    """Return a mock list of tasks."""
-    return [
-        {"id": 1, "title": "Write project README", "completed": True},
-        {"id": 2, "title": "Setup backend routes", "completed": False},
-        {"id": 3, "title": "Initialize frontend project", "completed": False},
-    ]
-
-@router.post("")
-def create_task():
-    """Mock create task response."""
-    return {"id": 4, "title": "New Task", "completed": False}
\ No newline at end of file
+TASK_FIELDS = tuple(TaskRead.model_fields)
+
+def parse_fields(fields: Optional[str]):
+    if not fields:
+        return TASK_FIELDS
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in TASK_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(unknown)}")
+    # id is always selected: it is the pagination key
+    return ("id",) + tuple(f for f in dict.fromkeys(requested) if f != "id")
+
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None:
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+
+@router.get("", response_model=TaskPage)
+async def get_tasks(
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    completed: Optional[bool] = None,
+    fields: Optional[str] = Query(default=None, description="Comma-separated subset of id,title,completed,client_id"),
+    user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    List the current user's tasks, one keyset page at a time.
+
+    Pages walk the (user_id, id) index, so every page costs the same no matter how
+    many tasks the user has.
+    """
+    columns = parse_fields(fields)
+    after_id = parse_cursor(cursor)
+
+    query = select(*(getattr(Task, name) for name in columns)).where(Task.user_id == user.id)
+    if completed is not None:
+        query = query.where(Task.completed == completed)
+    if after_id is not None:
+        query = query.where(Task.id > after_id)
+    # one extra row tells us whether another page exists
+    query = query.order_by(Task.id).limit(limit + 1)
+
+    rows = (await session.exec(query)).all()
+    if len(columns) == 1:
+        # a one-column select (fields=id) comes back as scalars, not rows
+        rows = [(row,) for row in rows]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return TaskPage(
+        items=[dict(zip(columns, row)) for row in rows],
+        nextCursor=str(rows[-1][0]) if has_more else None,
+    )
+
+@router.post("", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
+async def create_task(
+    payload: TaskCreate,
+    user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """Create a task for the current user."""
+    await ensure_user(session, user)
+    task = Task(user_id=user.id, client_id=payload.client_id, title=payload.title, completed=payload.completed)
+    session.add(task)
+    await session.commit()
+    await session.refresh(task)
+    return task
+
+@router.post("/bulk", response_model=TaskBulkResponse)
+async def bulk_write_tasks(
+    payload: TaskBulkRequest,
+    user: AuthUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Apply a mixed batch of creates/updates/deletes in one transaction.
+
+    Tasks are addressed by client_id, and creates/updates are a single multi-row
+    INSERT ... ON CONFLICT (user_id, client_id) DO UPDATE, so replaying a batch after a
+    network failure is safe and cheap.
+    """
+    client_ids = [op.client_id for op in payload.ops]
+    if len(set(client_ids)) != len(client_ids):
+        raise HTTPException(status_code=422, detail="Each client_id may appear only once per batch")
+
+    writes = [op for op in payload.ops if op.op != "delete"]
+    deletes = [op.client_id for op in payload.ops if op.op == "delete"]
+
+    await ensure_user(session, user)
+
+    ids: Dict[str, int] = {}
+    existing: Set[str] = set()
+    if writes:
+        write_ids = [op.client_id for op in writes]
+        existing = set((await session.exec(
+            select(Task.client_id).where(Task.user_id == user.id, Task.client_id.in_(write_ids))
+        )).all())
+
+        insert = dialect_insert(session)
+        stmt = insert(Task).values([
+            {"user_id": user.id, "client_id": op.client_id, "title": op.title, "completed": op.completed}
+            for op in writes
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "client_id"],
+            set_={"title": stmt.excluded.title, "completed": stmt.excluded.completed},
+        ).returning(Task.client_id, Task.id)
+        ids = {client_id: task_id for client_id, task_id in (await session.exec(stmt)).all()}
+
+    deleted: Set[str] = set()
+    if deletes:
+        result = await session.exec(
+            delete(Task)
+            .where(Task.user_id == user.id, Task.client_id.in_(deletes))
+            .returning(Task.client_id)
+        )
+        deleted = set(result.scalars().all())
+
+    await session.commit()
+
+    results = []
+    for op in payload.ops:
+        status_: BulkStatus
+        if op.op == "delete":
+            status_ = "deleted" if op.client_id in deleted else "not_found"
+            results.append(TaskBulkResult(client_id=op.client_id, op=op.op, status=status_))
+        else:
+            status_ = "updated" if op.client_id in existing else "created"
+            results.append(TaskBulkResult(client_id=op.client_id, op=op.op, status=status_, id=ids.get(op.client_id)))
+    return TaskBulkResponse(results=results)
@@ -0,0 +1,44 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import jwt
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from core.config import get_settings
+
+bearer = HTTPBearer(auto_error=False)
+
+@dataclass(frozen=True)
+class AuthUser:
+    id: str
+    email: str
+
+def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)) -> AuthUser:
+    """Verify the Supabase access token (HS256, signed with the project JWT secret)."""
+    secret = get_settings().SUPABASE_JWT_SECRET
+    if not secret:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Authentication is not configured")
+    if credentials is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    try:
+        claims = jwt.decode(
+            credentials.credentials,
+            secret,
+            algorithms=["HS256"],
+            audience="authenticated",
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    return AuthUser(id=claims["sub"], email=claims.get("email") or "")
+
+def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)) -> Optional[AuthUser]:
+    """Like get_current_user, but guests (and stale tokens) get None instead of a 401."""
+    if credentials is None:
+        return None
+    try:
+        return get_current_user(credentials)
+    except HTTPException:
+        return None
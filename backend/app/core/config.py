@@ -1,12 +1,29 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from typing import Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
-    DATABASE_URL: str
-    SUPABASE_JWT_SECRET: str
-    SUPABASE_PROJECT_URL: str
-    SUPABASE_SERVICE_ROLE_KEY: str
+    # .env also carries the os.getenv-based options (PLAN_WORKERS, ...), so unknown keys are ignored
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # optional so planner-only deployments boot without a database or Supabase project;
+    # the routes that need them are disabled (DB) or answer 503 (auth)
+    DATABASE_URL: Optional[str] = None
+    SUPABASE_JWT_SECRET: Optional[str] = None
+    SUPABASE_PROJECT_URL: Optional[str] = None
+    SUPABASE_SERVICE_ROLE_KEY: Optional[str] = None
+
+    # connection pool (ignored for SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800   # seconds; stay under Supabase/pgbouncer idle timeouts
 
-    class Config:
-        env_file = ".env"
+@lru_cache
+def get_settings() -> Settings:
+    """Settings, read from the environment / .env on first use."""
+    return Settings()
 
-settings = Settings()
\ No newline at end of file
+def database_configured() -> bool:
+    return bool(get_settings().DATABASE_URL)
@@ -1,8 +1,146 @@
-from sqlmodel import SQLModel, create_engine
-from app.core.config import settings
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 
-engine = create_engine(settings.DATABASE_URL, echo=False)
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-def init_db():
-    from app.models import Task, Plan, Session, User  # register models
-    SQLModel.metadata.create_all(engine)
\ No newline at end of file
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
+_schema_ready = False
+_schema_lock: Optional[asyncio.Lock] = None
+
+# sync driver URLs (as in .env) mapped onto their async drivers
+ASYNC_DRIVERS = {
+    "postgres://": "postgresql+asyncpg://",
+    "postgresql://": "postgresql+asyncpg://",
+    "postgresql+psycopg2://": "postgresql+asyncpg://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+
+# columns added to tables that already existed before them; create_all only creates
+# missing tables, so upgrade_schema adds these (and every declared index) in place.
+# The same DDL is in backend/migrations/ for databases managed by hand.
+ADDED_COLUMNS = [
+    # (table, column, SQL default for existing rows of a NOT NULL column)
+    ("task", "client_id", None),
+    ("plan", "blob", None),
+    ("plan", "kind", "'generate'"),
+    ("plan", "seed", None),
+    ("plan", "task_hash", None),
+]
+
+def async_database_url(url: str) -> str:
+    for prefix, replacement in ASYNC_DRIVERS.items():
+        if url.startswith(prefix):
+            return replacement + url[len(prefix):]
+    return url
+
+def create_engine_for(url: str) -> AsyncEngine:
+    settings = get_settings()
+    url = async_database_url(url)
+    if url.startswith("sqlite"):
+        # in-memory SQLite must share one connection or every session sees an empty db
+        pool_args = {"poolclass": StaticPool} if ":memory:" in url or url.endswith("://") else {}
+        return create_async_engine(url, echo=False, connect_args={"check_same_thread": False}, **pool_args)
+
+    return create_async_engine(
+        url,
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+
+def get_engine() -> AsyncEngine:
+    """Process-wide async engine, created at startup (see warm_engine) or on first use."""
+    global _engine, _sessionmaker
+    if _engine is None:
+        url = get_settings().DATABASE_URL
+        if not url:
+            raise RuntimeError("DATABASE_URL is not set")
+        _engine = create_engine_for(url)
+        _sessionmaker = async_sessionmaker(_engine, class_=AsyncSession, expire_on_commit=False)
+    return _engine
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """Session for work outside a request's dependency scope (e.g. background tasks)."""
+    await ensure_schema()
+    assert _sessionmaker is not None  # set with the engine, which ensure_schema creates
+    async with _sessionmaker() as session:
+        yield session
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """Request-scoped session dependency."""
+    async with session_scope() as session:
+        yield session
+
+async def warm_engine():
+    """Create the engine and the schema at startup, so the first request skips both."""
+    try:
+        await ensure_schema()
+    except Exception:
+        logger.warning("Database warm-up failed; retrying on first use instead", exc_info=True)
+
+async def init_db():
+    from models import Task, Plan, Session, User  # register models
+    async with get_engine().begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+
+def upgrade_schema(conn):
+    """Add ADDED_COLUMNS and declared indexes missing from existing tables; safe to rerun."""
+    tables = SQLModel.metadata.tables
+    inspector = inspect(conn)
+    for table_name, column_name, default in ADDED_COLUMNS:
+        present = {c["name"] for c in inspector.get_columns(table_name)}
+        if column_name in present:
+            continue
+        column = tables[table_name].c[column_name]
+        ddl = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column.type.compile(dialect=conn.dialect)}"
+        if default is not None:
+            ddl += f" NOT NULL DEFAULT {default}"
+        conn.execute(text(ddl))
+        logger.info("Added column %s.%s", table_name, column_name)
+    for table in tables.values():
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+async def ensure_schema():
+    """Run init_db once per process before the first session; retried if it failed."""
+    global _schema_ready, _schema_lock
+    if _schema_ready:
+        return
+    if _schema_lock is None:
+        _schema_lock = asyncio.Lock()
+    async with _schema_lock:
+        if not _schema_ready:
+            await init_db()
+            _schema_ready = True
+
+async def dispose_engine():
+    global _engine, _sessionmaker, _schema_ready, _schema_lock
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _sessionmaker = None
+    _schema_ready = False
+    _schema_lock = None
+
+def dialect_insert(session: AsyncSession):
+    """INSERT construct supporting ON CONFLICT for the session's database."""
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
@@ -0,0 +1,214 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+# seconds; tuned for planner phases (sub-ms) up to large plans (seconds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROFILE_HEADER = "x-plan-profile"
+
+# phase -> seconds for the current request, only set when profiling was requested
+_profile: ContextVar[Optional[Dict[str, float]]] = ContextVar("plan_profile", default=None)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    le_label = f'le="{le}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le_label)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        """Register a callback producing exposition lines at scrape time (e.g. cache gauges)."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "fehrist_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+http_latency = registry.histogram(
+    "fehrist_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+)
+plan_phase_latency = registry.histogram(
+    "fehrist_plan_phase_duration_seconds", "Time spent in each planner phase.", ("phase",)
+)
+
+
+class span:
+    """
+    Time a planner phase into the phase histogram (and the request profile, if enabled).
+    A slotted class rather than a @contextmanager generator: about half the overhead,
+    which shows on small plans that run several phases in a few tens of microseconds.
+    """
+
+    __slots__ = ("phase", "start")
+
+    def __init__(self, phase: str):
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        plan_phase_latency.observe(elapsed, self.phase)
+        profile = _profile.get()
+        if profile is not None:
+            profile[self.phase] = profile.get(self.phase, 0.0) + elapsed
+
+
+def call_with_phases(fn: Callable, *args) -> Tuple[object, Dict[str, float]]:
+    """
+    fn(*args) and the phases it timed, as (result, {phase: seconds}). For work run in
+    a worker process, whose spans reach neither this process's metrics nor the request
+    profile; pass the phases to record_phases on the way back.
+    """
+    phases: Dict[str, float] = {}
+    token = _profile.set(phases)
+    try:
+        return fn(*args), phases
+    finally:
+        _profile.reset(token)
+
+
+def record_phases(phases: Dict[str, float]):
+    """Record phase timings measured elsewhere (see call_with_phases) as if spanned here."""
+    profile = _profile.get()
+    for phase, seconds in phases.items():
+        plan_phase_latency.observe(seconds, phase)
+        if profile is not None:
+            profile[phase] = profile.get(phase, 0.0) + seconds
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: counts and times every HTTP request by route template, and
+    when the request sends `X-Plan-Profile: 1`, returns the planner phase breakdown
+    as a Server-Timing header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode() and value not in (b"", b"0", b"false"):
+                profile = {}
+                break
+        token = _profile.set(profile) if profile is not None else None
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile is not None:
+                    timing = ", ".join(f"{phase};dur={seconds * 1000:.3f}" for phase, seconds in profile.items())
+                    handler = (time.perf_counter() - start) * 1000
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", f"{timing + ', ' if timing else ''}total;dur={handler:.3f}".encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_requests.inc(scope["method"], path, str(status))
+            http_latency.observe(elapsed, scope["method"], path)
+            if token is not None:
+                _profile.reset(token)
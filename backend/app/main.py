@@ -1,11 +1,21 @@
-from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api.routes import router as api_router
-from api.routes import tasks
 from api.routes import plan
-from api.routes import session
 from api.routes import ping
+from api.routes import admin
+from api.routes import metrics
+from core.config import database_configured
+from core.metrics import MetricsMiddleware
+from services.category_registry import category_registry
+from services.profiles import profile_registry
+from services.executor import PLAN_EXECUTOR, plan_executor
+from services.plan_cache import plan_cache
+from services.workers import shutdown_process_pool, warm_process_pool
+
+logger = logging.getLogger(__name__)
 
 origins = [
     "http://localhost:3000",      # local frontend
@@ -13,7 +23,34 @@ origins = [
     # "https://www.fehrist.app",    # optional www subdomain
 ]
 
-app = FastAPI(title="Fehrist API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load and index categories once, before the first planning request
+    category_registry.load()
+    # fail fast on an invalid profiles file rather than on the first request
+    profile_registry.load()
+    if PLAN_EXECUTOR == "process":
+        # start the planning workers now rather than on the first plan
+        warm_process_pool()
+
+    warmup = None
+    if database_configured():
+        from core.database import dispose_engine, warm_engine
+
+        # create missing tables and connect in the background so startup (and /health) doesn't wait
+        # on the database; sessions wait for the schema instead
+        warmup = asyncio.create_task(warm_engine())
+    yield
+    plan_executor.shutdown()
+    await plan_cache.close()
+    shutdown_process_pool()
+    if warmup is not None:
+        warmup.cancel()
+        await dispose_engine()
+
+app = FastAPI(title="Fehrist API", lifespan=lifespan)
+
+app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,11 +60,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(tasks.router)
 app.include_router(plan.router)
-app.include_router(session.router)
 app.include_router(ping.router)
+app.include_router(admin.router)
+app.include_router(metrics.router)
+
+# task/session/plan-history routes (and the database stack) only load when a database is configured
+if database_configured():
+    from api.routes import plans, session, tasks
+
+    app.include_router(tasks.router)
+    app.include_router(plans.router)
+    app.include_router(session.router)
+else:
+    logger.warning("DATABASE_URL is not set; serving planner routes only")
 
+# liveness stays on the event loop: it needs no threadpool slot, so busy planners can't delay it
 @app.api_route("/health", methods=["GET", "HEAD"])
-def health():
-    return {"status": "ok"}
\ No newline at end of file
+async def health():
+    return {"status": "ok"}
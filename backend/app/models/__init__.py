@@ -1,25 +1,9 @@
-from sqlmodel import SQLModel, Field
-from typing import Optional
-from datetime import datetime
-
-class User(SQLModel, table=True):
-    id: str = Field(primary_key=True)
-    email: str
-
-class Task(SQLModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: Optional[str] = Field(default=None, foreign_key="user.id")
-    title: str
-    completed: bool = False
-
-class Plan(SQLModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: Optional[str] = Field(default=None, foreign_key="user.id")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    data: str
-
-class Session(SQLModel, table=True):
-    id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: Optional[str] = Field(default=None, foreign_key="user.id")
-    start_time: datetime = Field(default_factory=datetime.utcnow)
-    end_time: Optional[datetime] = None
\ No newline at end of file
+# Table models live in models.tables and are loaded on first access, so importing the
+# API schemas (models.plan, ...) doesn't pull in SQLModel/SQLAlchemy.
+_TABLES = ("User", "Task", "Plan", "Session")
+
+def __getattr__(name):
+    if name in _TABLES:
+        from models import tables
+        return getattr(tables, name)
+    raise AttributeError(f"module 'models' has no attribute '{name}'")
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Literal, Optional, List
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional, List, Union
 
 class Task(BaseModel):
     id: str
@@ -15,6 +16,25 @@ class SplitInfo(BaseModel):
     part: int
     totalParts: int
 
+class SchedulingProfile(BaseModel):
+    """Block and break timings the scheduler plans with (minutes). Defaults are the classic 30/5/15 plan."""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    blockLength: int = Field(default=30, ge=5, le=240)
+    shortBreak: int = Field(default=5, ge=1, le=120)
+    longBreak: int = Field(default=15, ge=1, le=240)
+    longBreakEvery: int = Field(default=4, ge=1, le=20)              # substantial blocks per long break
+    continuousWorkThreshold: int = Field(default=40, ge=1, le=480)   # work minutes before a break is due
+    quickTaskMinutes: int = Field(default=10, ge=0, le=240)          # tasks this short are quick tasks
+
+    @model_validator(mode="after")
+    def check_timings(self):
+        if self.quickTaskMinutes > self.blockLength:
+            raise ValueError("quickTaskMinutes cannot exceed blockLength")
+        if self.longBreak < self.shortBreak:
+            raise ValueError("longBreak cannot be shorter than shortBreak")
+        return self
+
 class PlanBlock(BaseModel):
     blockId: int
     type: Literal["work", "break"]
@@ -24,12 +44,23 @@ class PlanBlock(BaseModel):
 
 class PlanGenerateRequest(BaseModel):
     tasks: List[Task]
+    # a profile name ("pomodoro", "deep-work", ...) or explicit timings; the tenant's
+    # profile (or the default) is used when omitted
+    profile: Union[str, SchedulingProfile, None] = None
+    # "optimal" bin-packs the micro-task batches into as few blocks as it can
+    packing: Literal["greedy", "optimal"] = "greedy"
 
 class PlanGenerateResponse(BaseModel):
     blocks: List[PlanBlock]
     totalDurationMinutes: int
     totalBlocks: int
     quickTaskUsed: bool
+    utilization: Optional[float] = None   # work minutes / (work blocks * blockLength)
+
+class PlanBatchGenerateRequest(BaseModel):
+    # each item is a PlanGenerateRequest payload; validated per item so one bad
+    # payload only fails its own line of the response
+    items: List[Dict[str, Any]] = Field(max_length=1000)
 
 class PlanRegenerateRequest(BaseModel):
     tasks: List[Task]
@@ -37,11 +68,73 @@ class PlanRegenerateRequest(BaseModel):
     randomness: float = 0.3   # 0 = deterministic, 1 = very random
     allowDifferentQuickTask: bool = True
     allowReverseAnchor: bool = True
+    profile: Union[str, SchedulingProfile, None] = None
 
 class PlanRegenerateResponse(BaseModel):
     blocks: List[PlanBlock]
     totalDurationMinutes: int
     totalBlocks: int
     quickTaskUsed: bool
+    utilization: Optional[float] = None
     seedUsed: int
-    variationExplanation: str
\ No newline at end of file
+    variationExplanation: str
+
+class PlanCandidatesRequest(PlanRegenerateRequest):
+    candidates: int = Field(5, ge=1, le=20)   # variations to generate, from seeds derived from `seed`
+    topK: Optional[int] = Field(None, ge=1)   # return only the best k by quality score
+
+class PlanQuality(BaseModel):
+    score: float                # higher is better
+    categorySwitches: int       # adjacent work tasks in different categories
+    breaks: int
+    anchorDifficulty: int       # difficulty of the first long (anchor) task, 0 if none
+
+class PlanCandidate(PlanRegenerateResponse):
+    quality: PlanQuality
+
+class PlanCandidatesResponse(BaseModel):
+    baseSeed: int
+    candidates: List[PlanCandidate]   # best first
+
+class TaskChange(BaseModel):
+    op: Literal["add", "update", "complete", "delete"]
+    task: Optional[Task] = None      # add / update
+    taskId: Optional[str] = None     # complete / delete
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if self.op in ("add", "update") and self.task is None:
+            raise ValueError(f"'{self.op}' requires task")
+        if self.op in ("complete", "delete") and self.taskId is None and self.task is None:
+            raise ValueError(f"'{self.op}' requires taskId")
+        return self
+
+    @property
+    def target_id(self) -> str:
+        if self.taskId is not None:
+            return self.taskId
+        assert self.task is not None  # check_target requires one of them
+        return self.task.id
+
+class PlanPatchRequest(BaseModel):
+    tasks: List[Task]                      # task list the previous plan was generated from
+    plan: PlanGenerateResponse             # the previous plan
+    changes: List[TaskChange]
+    currentBlockId: Optional[int] = None   # blocks before this one are done and never rescheduled
+    preserveOrder: bool = False            # used when the whole plan has to be rebuilt
+    profile: Union[str, SchedulingProfile, None] = None   # must match the one the plan was built with
+
+class PlanPatchResponse(PlanGenerateResponse):
+    rescheduledFromBlockId: Optional[int] = None   # None when nothing changed
+
+class SavedPlanSummary(BaseModel):
+    id: int
+    kind: Literal["generate", "regenerate"]
+    createdAt: datetime
+    seed: Optional[int] = None
+    totalDurationMinutes: int
+    totalBlocks: int
+    quickTaskUsed: bool
+
+class SavedPlan(SavedPlanSummary):
+    blocks: List[PlanBlock]
@@ -0,0 +1,10 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+class SessionRead(BaseModel):
+    id: int
+    status: Literal["active", "ended"]
+    start_time: datetime
+    end_time: Optional[datetime] = None
@@ -0,0 +1,44 @@
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+class User(SQLModel, table=True):
+    id: str = Field(primary_key=True)
+    email: str
+
+class Task(SQLModel, table=True):
+    __table_args__ = (
+        # keyset pagination walks (user_id, id); the completed filter narrows the same walk
+        Index("ix_task_user_id_id", "user_id", "id"),
+        Index("ix_task_user_id_completed_id", "user_id", "completed", "id"),
+        # client-generated ids (nanoid) make bulk writes idempotent
+        Index("ux_task_user_id_client_id", "user_id", "client_id", unique=True),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: Optional[str] = Field(default=None, foreign_key="user.id")
+    client_id: Optional[str] = None
+    title: str
+    completed: bool = False
+
+class Plan(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_plan_user_id_created_at", "user_id", "created_at"),
+        Index("ix_plan_user_id_task_hash", "user_id", "task_hash"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: Optional[str] = Field(default=None, foreign_key="user.id")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    data: str = ""                    # legacy JSON body; new plans are stored in blob
+    blob: Optional[bytes] = None      # services.plan_codec encoding
+    kind: str = "generate"            # generate | regenerate
+    seed: Optional[int] = None
+    task_hash: Optional[str] = None   # canonical input hash (same as the plan ETag)
+
+class Session(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: Optional[str] = Field(default=None, foreign_key="user.id")
+    start_time: datetime = Field(default_factory=datetime.utcnow)
+    end_time: Optional[datetime] = None
\ No newline at end of file
@@ -0,0 +1,45 @@
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+class TaskCreate(BaseModel):
+    title: str = Field(min_length=1, max_length=500)
+    completed: bool = False
+    client_id: Optional[str] = Field(default=None, max_length=64)
+
+class TaskRead(BaseModel):
+    id: int
+    title: str
+    completed: bool
+    client_id: Optional[str] = None
+
+class TaskPage(BaseModel):
+    items: List[Dict[str, Any]]        # TaskRead fields, limited to the requested projection
+    nextCursor: Optional[str] = None   # pass back as ?cursor= for the next page; None on the last page
+
+class TaskBulkOp(BaseModel):
+    op: Literal["create", "update", "delete"]
+    client_id: str = Field(min_length=1, max_length=64)
+    # create/update carry the full task state, so replays are plain upserts
+    title: Optional[str] = Field(default=None, min_length=1, max_length=500)
+    completed: bool = False
+
+    @model_validator(mode="after")
+    def check_title(self):
+        if self.op != "delete" and self.title is None:
+            raise ValueError(f"'{self.op}' requires title")
+        return self
+
+class TaskBulkRequest(BaseModel):
+    ops: List[TaskBulkOp] = Field(max_length=1000)
+
+BulkStatus = Literal["created", "updated", "deleted", "not_found"]
+
+class TaskBulkResult(BaseModel):
+    client_id: str
+    op: Literal["create", "update", "delete"]
+    status: BulkStatus
+    id: Optional[int] = None
+
+class TaskBulkResponse(BaseModel):
+    results: List[TaskBulkResult]
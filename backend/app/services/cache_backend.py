@@ -0,0 +1,274 @@
+"""
+Storage behind the planner's response cache.
+
+CACHE_BACKEND selects where entries live:
+
+    local   an LRU in this process, bounded by entries and bytes (default)
+    redis   a Redis-protocol server at CACHE_URL, shared by every worker and instance,
+            so a plan built by one of them is a hit for all (needs the redis package)
+
+Keys are namespaced as "<CACHE_NAMESPACE>:<cache>:<key>", so several caches and
+deployments can share one server, and every entry carries a TTL. Shared values are
+stored in a compact binary envelope: one format byte, then the payload, zlib-compressed
+when that makes it smaller. Backend failures count as misses and are logged once per
+outage; the cache never fails a request.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKENDS = ("local", "redis")
+CACHE_BACKEND = (os.getenv("CACHE_BACKEND") or "local").lower()
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ValueError(f"CACHE_BACKEND must be one of {', '.join(CACHE_BACKENDS)}")
+CACHE_URL = os.getenv("CACHE_URL") or "redis://localhost:6379/0"
+CACHE_NAMESPACE = os.getenv("CACHE_NAMESPACE") or "fehrist"
+CACHE_TIMEOUT_SECONDS = float(os.getenv("CACHE_TIMEOUT_MS") or 250) / 1000
+
+# envelope format bytes
+RAW = b"\x00"
+ZLIB = b"\x01"
+# smaller values are not worth a compression attempt
+COMPRESS_MIN_BYTES = 1024
+
+
+def pack_value(value: bytes) -> bytes:
+    if len(value) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(value, 1)
+        if len(packed) < len(value):
+            return ZLIB + packed
+    return RAW + value
+
+
+def unpack_value(data: bytes) -> Optional[bytes]:
+    """The stored value, or None for an envelope this version can't read (a miss)."""
+    kind, payload = data[:1], data[1:]
+    if kind == RAW:
+        return payload
+    if kind == ZLIB:
+        try:
+            return zlib.decompress(payload)
+        except zlib.error:
+            return None
+    return None
+
+
+class CacheBackend(ABC):
+    """Async byte store. `shared` backends are seen by every worker."""
+
+    name = "base"
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Set key only if it is absent; True when this call set it."""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def clear(self, prefix: str):
+        ...
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+
+class LocalCache(CacheBackend):
+    """
+    Thread-safe LRU + TTL of byte values, bounded by entry count and total bytes.
+    lookup() and store() are the synchronous forms of get() and set(), for in-process
+    callers on hot paths (the category memo).
+    """
+
+    name = "local"
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._size = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.lookup(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self.store(key, value, ttl)
+
+    def lookup(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def store(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if len(value) > self.max_bytes or self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + ttl if ttl else float("inf")
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (value, expires_at)
+            self._size += len(value)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        if self.lookup(key) is not None:
+            return False
+        self.store(key, value, ttl)
+        return True
+
+    async def delete(self, key: str):
+        with self._lock:
+            self._drop(key)
+
+    async def clear(self, prefix: str):
+        self.clear_prefix(prefix)
+
+    def clear_prefix(self, prefix: str):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._drop(key)
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": self.name, "entries": len(self._entries), "bytes": self._size,
+                    "maxEntries": self.max_entries, "maxBytes": self.max_bytes}
+
+
+class RedisCache(CacheBackend):
+    """Entries on a Redis-protocol server, in the pack_value envelope."""
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, url: str, timeout: float = CACHE_TIMEOUT_SECONDS):
+        try:
+            import redis.asyncio  # noqa: F401
+        except ImportError as exc:
+            raise ValueError("the redis package is required for CACHE_BACKEND=redis") from exc
+        self.url = url
+        self.timeout = timeout
+        self.errors = 0
+        self._failing = False
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _redis(self):
+        import redis.asyncio
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # connections belong to the event loop that opened them
+            self._client = redis.asyncio.Redis.from_url(
+                self.url, socket_timeout=self.timeout, socket_connect_timeout=self.timeout
+            )
+            self._loop = loop
+        return self._client
+
+    def _failed(self, exc: Exception):
+        self.errors += 1
+        if not self._failing:
+            self._failing = True
+            logger.warning("Cache backend %s unavailable (%s); serving without it", self.url, exc)
+
+    def _ok(self):
+        if self._failing:
+            self._failing = False
+            logger.info("Cache backend %s is back", self.url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            data = await self._redis().get(key)
+        except Exception as exc:  # connection, timeout or protocol errors alike
+            self._failed(exc)
+            return None
+        self._ok()
+        return None if data is None else unpack_value(data)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        try:
+            await self._redis().set(key, pack_value(value), px=int(ttl * 1000) if ttl else None)
+        except Exception as exc:
+            self._failed(exc)
+            return
+        self._ok()
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        try:
+            added = await self._redis().set(key, pack_value(value), px=int(ttl * 1000) if ttl else None, nx=True)
+        except Exception as exc:
+            # without the server nobody else can see a lease either: build locally
+            self._failed(exc)
+            return True
+        self._ok()
+        return bool(added)
+
+    async def delete(self, key: str):
+        try:
+            await self._redis().delete(key)
+        except Exception as exc:
+            self._failed(exc)
+
+    async def clear(self, prefix: str):
+        client = self._redis()
+        try:
+            batch = []
+            async for key in client.scan_iter(match=prefix + "*", count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    await client.unlink(*batch)
+                    batch = []
+            if batch:
+                await client.unlink(*batch)
+        except Exception as exc:
+            self._failed(exc)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "errors": self.errors}
+
+
+def make_backend(max_entries: int, max_bytes: int) -> CacheBackend:
+    """The configured backend; the bounds apply to the local one (Redis has its own maxmemory)."""
+    if CACHE_BACKEND == "redis":
+        return RedisCache(CACHE_URL)
+    return LocalCache(max_entries, max_bytes)
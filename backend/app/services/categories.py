@@ -0,0 +1,91 @@
+import hashlib
+import json
+import re
+from typing import Dict, List, Tuple
+
+TOKEN_RE = re.compile(r"\w+")
+
+# marks the end of a phrase inside the trie; tokens are always \w+ so it never collides
+_PHRASE_END = ""
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class CategoryClassifier:
+    """
+    Keyword-based category matcher, built once from a {category: [keywords]} table.
+
+    Single-word keywords go into an inverted token -> categories index, multi-word
+    keywords ("follow up", "pull request") into a token trie. Classifying a text
+    walks its tokens once, so cost depends on the text length, not on the table size.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        self.names: Tuple[str, ...] = tuple(categories.keys())
+        # changes whenever the keyword table does; used to key cached classifications
+        self.version = hashlib.blake2b(
+            json.dumps(categories).encode("utf-8"), digest_size=8
+        ).hexdigest()
+        self.phrase_trie: dict = {}
+        self.max_phrase_len = 0
+
+        token_index: Dict[str, List[int]] = {}
+        for idx, keywords in enumerate(categories.values()):
+            for keyword in keywords:
+                words = tokenize(keyword)
+                if not words:
+                    continue
+                if len(words) == 1:
+                    cats = token_index.setdefault(words[0], [])
+                    if idx not in cats:
+                        cats.append(idx)
+                    continue
+
+                node = self.phrase_trie
+                for word in words:
+                    node = node.setdefault(word, {})
+                cats = node.setdefault(_PHRASE_END, [])
+                if idx not in cats:
+                    cats.append(idx)
+                self.max_phrase_len = max(self.max_phrase_len, len(words))
+
+        self.token_index = {tok: tuple(cats) for tok, cats in token_index.items()}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def scores(self, text: str) -> List[int]:
+        scores = [0] * len(self.names)
+        tokens = tokenize(text)
+        index = self.token_index
+        trie = self.phrase_trie
+
+        for i, token in enumerate(tokens):
+            for idx in index.get(token, ()):
+                scores[idx] += 1
+
+            # phrase matches starting at this token
+            node = trie.get(token) if trie else None
+            j = i + 1
+            while node is not None:
+                for idx in node.get(_PHRASE_END, ()):
+                    scores[idx] += 1
+                if j >= len(tokens):
+                    break
+                node = node.get(tokens[j])
+                j += 1
+
+        return scores
+
+    def classify(self, text: str) -> str:
+        if not self.names:
+            return "other"
+
+        scores = self.scores(text)
+        best = max(scores)
+        if best == 0:
+            return "other"
+        # ties go to the category listed first, same as max() over the dict
+        return self.names[scores.index(best)]
@@ -0,0 +1,70 @@
+import hashlib
+import threading
+from typing import Optional
+
+from services.cache_backend import CACHE_NAMESPACE, LocalCache
+from services.categories import CategoryClassifier
+
+# category names are short; the entry count is the real bound
+MAX_CATEGORY_BYTES = 64
+
+
+class CategoryCache:
+    """
+    Memo of task classifications on a LocalCache backend (LRU + TTL), kept per process:
+    a lookup is cheaper than any round trip to a shared backend.
+
+    Keys are a hash of (categories version, name, description), so entries computed
+    against an older keyword table are simply never hit again and age out.
+    """
+
+    def __init__(self, maxsize: int = 8192, ttl_seconds: Optional[float] = 3600):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds or None
+        self.backend = LocalCache(max_entries=maxsize, max_bytes=maxsize * MAX_CATEGORY_BYTES)
+        self.prefix = f"{CACHE_NAMESPACE}:category:"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, name: str, description: Optional[str], version: str) -> str:
+        raw = "\x1f".join((version, name, description or "")).encode("utf-8")
+        return self.prefix + hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.backend.lookup(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return value.decode("utf-8")
+
+    def put(self, key: str, category: str):
+        self.backend.store(key, category.encode("utf-8"), self.ttl_seconds)
+
+    def classify(self, name: str, description: Optional[str], classifier: CategoryClassifier) -> str:
+        key = self.make_key(name, description, classifier.version)
+        category = self.get(key)
+        if category is None:
+            category = classifier.classify(name + " " + (description or ""))
+            self.put(key, category)
+        return category
+
+    def clear(self):
+        self.backend.clear_prefix(self.prefix)
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": self.backend.stats()["entries"],
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# shared by /plan/generate and /plan/regenerate
+category_cache = CategoryCache()
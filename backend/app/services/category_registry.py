@@ -0,0 +1,127 @@
+import importlib.util
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from services.categories import CategoryClassifier
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORIES_PATH = Path(__file__).resolve().parent.parent / "data" / "categories.py"
+
+
+def validate_categories(data) -> Dict[str, List[str]]:
+    """Raise ValueError unless data is a {category: [keyword, ...]} table."""
+    if not isinstance(data, dict):
+        raise ValueError("categories must be a mapping of category -> keyword list")
+    for name, keywords in data.items():
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError(f"invalid category name: {name!r}")
+        if not isinstance(keywords, list):
+            raise ValueError(f"keywords for '{name}' must be a list")
+        for kw in keywords:
+            if not isinstance(kw, str) or not kw.strip():
+                raise ValueError(f"invalid keyword in '{name}': {kw!r}")
+    return data
+
+
+def read_categories_file(path: Path) -> Dict[str, List[str]]:
+    suffix = path.suffix.lower()
+    if suffix == ".py":
+        # executed as a fresh module every time so edits are picked up on reload
+        spec = importlib.util.spec_from_file_location("_fehrist_categories", path)
+        if spec is None or spec.loader is None:
+            raise ValueError(f"cannot load categories from {path}")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        data = getattr(module, "CATEGORIES", None)
+    elif suffix == ".json":
+        data = json.loads(path.read_text(encoding="utf-8"))
+    elif suffix in (".yaml", ".yml"):
+        try:
+            import yaml  # type: ignore[import-untyped]
+        except ImportError as exc:
+            raise ValueError("PyYAML is required to load YAML categories") from exc
+        data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    else:
+        raise ValueError(f"unsupported categories file type: {path.suffix}")
+    return validate_categories(data)
+
+
+class CategoryRegistry:
+    """
+    Holds the active CategoryClassifier.
+
+    The table is loaded and validated once, and reloaded atomically when the source
+    file's mtime changes (checked at most every `reload_interval` seconds) or when
+    `reload()` is called. Readers just grab the current classifier reference, so
+    in-flight requests keep using the version they started with.
+    """
+
+    def __init__(self, path: Path, reload_interval: float = 5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._classifier: Optional[CategoryClassifier] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> CategoryClassifier:
+        """Load (or reload) the table; raises if the file is missing or invalid."""
+        with self._lock:
+            mtime = self.path.stat().st_mtime
+            classifier = CategoryClassifier(read_categories_file(self.path))
+            self._classifier = classifier
+            self._mtime = mtime
+            self._checked_at = time.monotonic()
+        logger.info("Loaded %d categories (version %s) from %s", len(classifier), classifier.version, self.path)
+        return classifier
+
+    def reload(self) -> CategoryClassifier:
+        return self.load()
+
+    def current(self) -> CategoryClassifier:
+        classifier = self._classifier
+        if classifier is None:
+            return self.load()
+        if self.reload_interval > 0 and time.monotonic() - self._checked_at >= self.reload_interval:
+            self._maybe_reload()
+            classifier = self._classifier or classifier
+        return classifier
+
+    def _maybe_reload(self):
+        # only one request pays for the check; the rest keep the current classifier
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = self.path.stat().st_mtime
+            except OSError:
+                logger.exception("Categories file %s is not readable; keeping version %s",
+                                 self.path, self._classifier.version)
+                return
+            if mtime == self._mtime:
+                return
+            try:
+                classifier = CategoryClassifier(read_categories_file(self.path))
+            except Exception:
+                logger.exception("Failed to reload categories from %s; keeping version %s",
+                                 self.path, self._classifier.version)
+                self._mtime = mtime
+                return
+            self._classifier = classifier
+            self._mtime = mtime
+            logger.info("Reloaded categories (version %s) from %s", classifier.version, self.path)
+        finally:
+            self._lock.release()
+
+
+category_registry = CategoryRegistry(
+    Path(os.getenv("CATEGORIES_FILE") or DEFAULT_CATEGORIES_PATH),
+    reload_interval=float(os.getenv("CATEGORIES_RELOAD_INTERVAL") or 5),
+)
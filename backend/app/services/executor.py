@@ -0,0 +1,167 @@
+"""
+Where CPU-bound planning runs, and how much of it is admitted at once.
+
+PLAN_EXECUTOR selects the backend:
+
+    inline   on the event loop; only for tests and single-user setups, since a
+             large plan blocks every other request (including /health) meanwhile
+    thread   a dedicated pool of PLAN_MAX_CONCURRENT threads (default), so plans
+             don't take Starlette's threadpool slots from the other sync routes
+    process  the warm planning process pool (services.workers); plans run outside
+             the server's GIL, which keeps the event loop responsive under load
+
+Plans for at most PLAN_SMALL_MAX_TASKS tasks (default 10, most real requests) that
+fill at most PLAN_SMALL_MAX_BLOCKS work blocks (default 64) run inline on the event
+loop whatever the backend: they take less time than the hop to a thread or worker,
+and they never queue behind large plans.
+
+Admission control: at most PLAN_MAX_CONCURRENT plans run at once and up to
+PLAN_MAX_QUEUE more wait for a slot. Anything beyond that is refused with
+PlannerBusy, which the routes turn into 503 + Retry-After instead of queueing
+without bound. Streamed plans (stream, batch) plan as they send, so they hold a slot
+from acquire() until the response ends instead. Run state lives on the event loop,
+so no locks are needed.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from core.metrics import call_with_phases, record_phases, registry
+from services.workers import PLAN_WORKERS, get_process_pool
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+PLAN_EXECUTOR = (os.getenv("PLAN_EXECUTOR") or "thread").lower()
+if PLAN_EXECUTOR not in EXECUTOR_MODES:
+    raise ValueError(f"PLAN_EXECUTOR must be one of {', '.join(EXECUTOR_MODES)}")
+
+PLAN_MAX_CONCURRENT = int(os.getenv("PLAN_MAX_CONCURRENT") or max(1, PLAN_WORKERS))
+PLAN_MAX_QUEUE = int(os.getenv("PLAN_MAX_QUEUE") or 32)
+PLAN_RETRY_AFTER = int(os.getenv("PLAN_RETRY_AFTER") or 1)
+SMALL_PLAN_MAX_TASKS = int(os.getenv("PLAN_SMALL_MAX_TASKS") or 10)
+SMALL_PLAN_MAX_BLOCKS = int(os.getenv("PLAN_SMALL_MAX_BLOCKS") or 64)
+
+admissions = registry.counter(
+    "fehrist_plan_admissions_total", "Planning requests by admission outcome.", ("result",)
+)
+
+
+class PlannerBusy(Exception):
+    """Raised when the planning queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Planner is busy")
+        self.retry_after = retry_after
+
+
+def is_small_plan(task_count: int, blocks: int = 0) -> bool:
+    """
+    Cheap enough to plan inline on the event loop. Planning time grows with the work
+    blocks as well as the tasks (one task of a few thousand hours is a big plan), so
+    `blocks` is the request's estimated work blocks.
+    """
+    return task_count <= SMALL_PLAN_MAX_TASKS and blocks <= SMALL_PLAN_MAX_BLOCKS
+
+
+class PlanExecutor:
+    def __init__(self, mode: str = "thread", max_concurrent: int = 4, max_queue: int = 32, retry_after: int = 1):
+        self.mode = mode
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self.running = 0
+        self.waiting = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._threads_lock = threading.Lock()
+
+    async def run(
+        self, fn: Callable[..., Any], *args, processes: bool = True, size: Optional[int] = None, blocks: int = 0
+    ) -> Any:
+        """
+        Run fn(*args) on the backend once a slot is free. With the process backend fn
+        and its arguments must pickle, so pass module-level functions, not closures;
+        `processes=False` keeps work that fans out to the process pool itself on a thread.
+        `size` and `blocks` are the request's task count and estimated work blocks:
+        small plans run inline right away.
+        """
+        if not await self.acquire(size, blocks):
+            return fn(*args)
+        try:
+            return await self._dispatch(asyncio.get_running_loop(), fn, args, processes)
+        finally:
+            self.release()
+
+    async def acquire(self, size: Optional[int] = None, blocks: int = 0) -> bool:
+        """
+        Take a run slot, waiting in the queue for one if needed (PlannerBusy when the
+        queue is full). For planning that runs outside run(), such as streamed responses;
+        every True must be paired with release(). False means a small plan, which needs
+        no slot.
+        """
+        if size is not None and is_small_plan(size, blocks):
+            admissions.inc("inline")
+            return False
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._slots is None:
+            # one semaphore per event loop (the app has one; test clients may not)
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self._loop = loop
+        if self.running >= self.max_concurrent and self.waiting >= self.max_queue:
+            admissions.inc("rejected")
+            raise PlannerBusy(self.retry_after)
+
+        admissions.inc("admitted")
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        return True
+
+    def release(self):
+        assert self._slots is not None, "release() without acquire()"
+        self.running -= 1
+        self._slots.release()
+
+    async def _dispatch(
+        self, loop: asyncio.AbstractEventLoop, fn: Callable[..., Any], args: tuple, processes: bool
+    ) -> Any:
+        if self.mode == "inline":
+            return fn(*args)
+        if self.mode == "process" and processes:
+            pool = get_process_pool()
+            if pool is not None:
+                # the worker's spans come back with the result, for /metrics and X-Plan-Profile
+                result, phases = await loop.run_in_executor(pool, functools.partial(call_with_phases, fn, *args))
+                record_phases(phases)
+                return result
+        # run in a copy of this request's context, so spans still see its profile
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._thread_pool(), functools.partial(context.run, fn, *args))
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            with self._threads_lock:
+                if self._threads is None:
+                    self._threads = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="plan")
+        return self._threads
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "running": self.running, "waiting": self.waiting,
+                "maxConcurrent": self.max_concurrent, "maxQueue": self.max_queue}
+
+    def shutdown(self):
+        with self._threads_lock:
+            if self._threads is not None:
+                self._threads.shutdown(wait=False, cancel_futures=True)
+                self._threads = None
+
+
+plan_executor = PlanExecutor(PLAN_EXECUTOR, PLAN_MAX_CONCURRENT, PLAN_MAX_QUEUE, PLAN_RETRY_AFTER)
@@ -0,0 +1,199 @@
+"""
+Bin packing for micro-task batches (packing="optimal").
+
+Items are task durations and bins are work blocks of `capacity` minutes. The solver
+runs best-fit decreasing, then, for small inputs that best-fit leaves above the
+ceil(total / capacity) lower bound, a bounded branch-and-bound search for fewer bins.
+The search is bounded by a node count, not a clock: the same input always gets the
+same packing whatever the machine's load, which the plan cache and ETags rely on.
+"""
+import math
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.metrics import registry
+
+# inputs above this size go straight to greedy batching
+PACKING_MAX_ITEMS = int(os.getenv("PLAN_PACKING_MAX_ITEMS") or 2000)
+# branch-and-bound only runs on inputs up to this size
+REFINE_MAX_ITEMS = 64
+# search nodes branch-and-bound may visit (at most about 20 ms of search at the default)
+PACKING_BUDGET_NODES = int(os.getenv("PLAN_PACKING_BUDGET_NODES") or 4000)
+
+packing_runs = registry.counter(
+    "fehrist_plan_packing_total", "Optimal packing runs by outcome.", ("result",)
+)
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def fill_subset(durations: Sequence[int], items: List[int], capacity: int) -> List[int]:
+    """Items (indexes into durations) with the largest total <= capacity (subset-sum DP)."""
+    # reach[s] = item that first reached sum s, back-linked through parent sums
+    reach: Dict[int, Optional[Tuple[int, int]]] = {0: None}
+    for item in items:
+        d = durations[item]
+        for s in sorted(reach, reverse=True):
+            t = s + d
+            if t <= capacity and t not in reach:
+                reach[t] = (item, s)
+        if capacity in reach:
+            break
+    chosen = []
+    s = max(reach)
+    while (link := reach[s]) is not None:
+        item, s = link
+        chosen.append(item)
+    return chosen
+
+
+def best_fit_decreasing(durations: Sequence[int], items: List[int], capacity: int) -> List[List[int]]:
+    # bins bucketed by residual capacity so each placement is O(capacity)
+    bins: List[List[int]] = []
+    by_residual: List[List[int]] = [[] for _ in range(capacity + 1)]
+    for item in sorted(items, key=lambda i: -durations[i]):
+        d = durations[item]
+        for residual in range(d, capacity + 1):
+            if by_residual[residual]:
+                b = by_residual[residual].pop()
+                break
+        else:
+            b = len(bins)
+            bins.append([])
+            residual = capacity
+        bins[b].append(item)
+        by_residual[residual - d].append(b)
+    return bins
+
+
+def branch_and_bound(
+    durations: Sequence[int], items: List[int], capacity: int, best: int, max_nodes: int
+) -> Optional[List[List[int]]]:
+    """A packing into fewer than `best` bins, or None if none is found within max_nodes."""
+    order = sorted(items, key=lambda i: -durations[i])
+    sizes = [durations[i] for i in order]
+    suffix = [0] * (len(sizes) + 1)
+    for i in range(len(sizes) - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + sizes[i]
+    lower = math.ceil(suffix[0] / capacity)
+
+    loads: List[int] = []
+    assignment = [0] * len(sizes)
+    found: Optional[List[int]] = None
+    nodes = 0
+
+    def search(i: int):
+        nonlocal best, found, nodes
+        nodes += 1
+        if nodes > max_nodes:
+            raise _BudgetExceeded
+        if i == len(sizes):
+            best = len(loads)
+            found = assignment[:]
+            return
+        free = sum(capacity - load for load in loads)
+        if len(loads) + max(0, math.ceil((suffix[i] - free) / capacity)) >= best:
+            return
+        d = sizes[i]
+        tried = set()
+        for b, load in enumerate(loads):
+            # bins with equal load are interchangeable
+            if load + d <= capacity and load not in tried:
+                tried.add(load)
+                loads[b] += d
+                assignment[i] = b
+                search(i + 1)
+                loads[b] -= d
+                if best <= lower:
+                    return
+        if len(loads) + 1 < best:
+            loads.append(d)
+            assignment[i] = len(loads) - 1
+            search(i + 1)
+            loads.pop()
+
+    try:
+        search(0)
+    except _BudgetExceeded:
+        pass
+    if found is None:
+        return None
+    bins: List[List[int]] = [[] for _ in range(best)]
+    for i, b in enumerate(found):
+        bins[b].append(order[i])
+    return bins
+
+
+def pack_durations(
+    durations: Sequence[int], capacity: int, first_capacity: int = 0, budget: int = PACKING_BUDGET_NODES
+) -> Optional[List[List[int]]]:
+    """
+    Pack items (by index) into bins of `capacity`, using as few bins as the budget allows.
+
+    `first_capacity` is the room left in an already open block; it is filled first and
+    returned as the first bin. The remaining bins are ordered by their earliest item,
+    except that the least-filled one goes last, and each bin keeps its items in input
+    order, so higher-ranked tasks still come first.
+    `budget` bounds the branch-and-bound search in nodes, so the result depends only on
+    the input. Returns None when the input is too large or invalid, or the packing needs
+    as many bins as greedy batching would (use greedy then).
+    """
+    if len(durations) > PACKING_MAX_ITEMS or min(durations, default=0) < 0:
+        packing_runs.inc("fallback")
+        return None
+    items = list(range(len(durations)))
+
+    first: List[int] = []
+    if 0 < first_capacity < capacity:
+        first = fill_subset(durations, items, first_capacity)
+        taken = set(first)
+        items = [i for i in items if i not in taken]
+
+    bins = best_fit_decreasing(durations, items, capacity)
+
+    lower = math.ceil(sum(durations[i] for i in items) / capacity)
+    if len(bins) > lower and len(items) <= REFINE_MAX_ITEMS:
+        better = branch_and_bound(durations, items, capacity, len(bins), budget)
+        if better is not None:
+            bins = better
+
+    if len(bins) >= greedy_bins(durations, capacity, first_capacity) - (1 if first else 0):
+        # no fewer blocks than greedy batching: keep the greedy plan as is
+        packing_runs.inc("no_gain")
+        return None
+
+    packing_runs.inc("optimal" if len(bins) == lower else "best_effort")
+    ordered = sorted((sorted(b) for b in bins if b), key=lambda b: b[0])
+    if ordered:
+        # the least-filled bin goes last, where the block stays open for the next task's chunk
+        loads = [sum(durations[i] for i in b) for b in ordered]
+        ordered.append(ordered.pop(loads.index(min(loads))))
+    return ([sorted(first)] if first else []) + ordered
+
+
+def greedy_bins(durations: Sequence[int], capacity: int, first_capacity: int = 0) -> int:
+    """Batches greedy step 3 would start, the first one counted only if it misses the open block."""
+    batches = 0
+    used = capacity
+    first_load: Optional[int] = None
+    for d in durations:
+        if used + d > capacity:
+            if batches == 1:
+                first_load = used
+            batches += 1
+            used = 0
+        used += d
+    if batches == 1:
+        first_load = used
+    if first_load is not None and 0 < first_capacity and first_load <= first_capacity:
+        batches -= 1
+    return batches
+
+
+def plan_utilization(work_minutes: int, work_blocks: int, block_length: int) -> float:
+    """Share of scheduled work-block time that holds work."""
+    if not work_blocks:
+        return 0.0
+    return round(work_minutes / (work_blocks * block_length), 4)
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from models.plan import Task
+from services.cache_backend import CACHE_NAMESPACE, CacheBackend, make_backend
+
+# entries expire after this many seconds (0 keeps them until evicted)
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL") or 3600)
+# how long a worker may hold the build lease for a key on a shared backend
+PLAN_CACHE_LEASE_SECONDS = float(os.getenv("PLAN_CACHE_LEASE_MS") or 10000) / 1000
+LEASE_POLL_SECONDS = 0.02
+
+
+def plan_cache_key(route: str, tasks: Iterable[Task], **params) -> str:
+    """
+    Canonical hash of everything a plan depends on: the task fields in order plus
+    the route's parameters (preserve_order, seed, randomness, categories version...).
+    Also used as the response ETag, since equal keys always produce equal plans (the
+    optimal-packing search is bounded by nodes, not time, so it is no exception).
+    """
+    canonical = json.dumps(
+        [
+            route,
+            sorted(params.items()),
+            [
+                [t.id, t.name, t.description, t.priority, t.difficulty, t.durationMinutes, t.status]
+                for t in tasks
+            ],
+        ],
+        separators=(",", ":"),
+    )
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class PlanCache:
+    """
+    Serialized plan responses on the configured cache backend, under the "plan" namespace.
+
+    Values are the exact response bodies, so a hit skips both scheduling and
+    serialization. get_or_build() is single-flight: identical concurrent misses in a
+    process share one build, and with a shared backend a short lease key lets one
+    worker build while the others wait for its result.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        max_entries: int = 1024,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl: float = PLAN_CACHE_TTL,
+        lease_seconds: float = PLAN_CACHE_LEASE_SECONDS,
+    ):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl or None
+        self.lease_seconds = lease_seconds
+        self.prefix = f"{CACHE_NAMESPACE}:plan:"
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        # key -> build in progress in this process; only touched from the event loop
+        self._inflight: Dict[str, "asyncio.Future[bytes]"] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        body = await self.backend.get(self.prefix + key) if self.enabled else None
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+    async def put(self, key: str, body: bytes):
+        if self.enabled and len(body) <= self.max_bytes:
+            await self.backend.set(self.prefix + key, body, self.ttl)
+
+    async def get_or_build(self, key: str, build: Callable[[], Awaitable[bytes]]) -> Tuple[bytes, str]:
+        """(body, "hit" | "miss" | "coalesced"); build() runs at most once per key at a time."""
+        if not self.enabled:
+            return await build(), "miss"
+        cached = await self.get(key)
+        if cached is not None:
+            return cached, "hit"
+
+        while key in self._inflight:
+            pending = self._inflight[key]
+            try:
+                body = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # this request was cancelled, not the build
+                continue  # the build's own request went away: take over
+            self.coalesced += 1
+            return body, "coalesced"
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            body, status = await self._build_once(key, build)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            # waiters get the same error (e.g. a 503 from admission control)
+            future.set_exception(exc)
+            future.exception()  # retrieved: no "never retrieved" warning without waiters
+            raise
+        finally:
+            del self._inflight[key]
+        future.set_result(body)
+        return body, status
+
+    async def _build_once(self, key: str, build: Callable[[], Awaitable[bytes]]) -> Tuple[bytes, str]:
+        if not self.backend.shared:
+            body = await build()
+            await self.put(key, body)
+            return body, "miss"
+
+        lease = self.prefix + key + ":lease"
+        owned = await self.backend.add(lease, b"1", self.lease_seconds)
+        if not owned:
+            # another worker is building this plan: wait for it while its lease lasts
+            cached = await self._wait_for(key, lease)
+            if cached is not None:
+                self.coalesced += 1
+                return cached, "coalesced"
+        try:
+            body = await build()
+            await self.put(key, body)
+        finally:
+            if owned:
+                await self.backend.delete(lease)
+        return body, "miss"
+
+    async def _wait_for(self, key: str, lease: str) -> Optional[bytes]:
+        deadline = time.monotonic() + self.lease_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LEASE_POLL_SECONDS)
+            body = await self.backend.get(self.prefix + key)
+            if body is not None:
+                return body
+            if await self.backend.get(lease) is None:
+                # the lease is gone without a result (that build failed): check once more, then build here
+                return await self.backend.get(self.prefix + key)
+        return None
+
+    async def clear(self):
+        await self.backend.clear(self.prefix)
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> dict:
+        return {
+            **self.backend.stats(),
+            "ttlSeconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
+_max_entries = int(os.getenv("PLAN_CACHE_MAX_ENTRIES") or 1024)
+_max_bytes = int(os.getenv("PLAN_CACHE_MAX_BYTES") or 32 * 1024 * 1024)
+plan_cache = PlanCache(make_backend(_max_entries, _max_bytes), _max_entries, _max_bytes)
@@ -0,0 +1,185 @@
+"""
+Compact binary encoding for stored plans.
+
+Layout (little-endian), every section padded to 4 bytes:
+
+    header      magic "FPL1", flags (u32, bit 0 = quickTaskUsed), totalDurationMinutes,
+                block count, task-id count, task-ref count, split count (u32 each)
+    id offsets  u32[ids + 1]   offsets of each interned task id in the id blob
+    id blob     utf-8 task ids, concatenated
+    blocks      parallel arrays: blockId u32[n], durationMinutes u32[n], type u8[n],
+                task offsets u32[n + 1], split offsets u32[n + 1]
+    task refs   u32[refs]      index into the id table, per block task entry
+    splits      parallel arrays: task u32[s], part u32[s], totalParts u32[s]
+
+Block i's tasks are task refs [task_offsets[i], task_offsets[i + 1]), so a single
+block can be read without decoding the rest of the plan (see PlanView).
+"""
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional
+
+MAGIC = b"FPL1"
+HEADER = struct.Struct("<4s6I")
+BLOCK_TYPES = ("work", "break")
+
+
+def _u32(values) -> bytes:
+    data = array("I", values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data.tobytes()
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 4)
+
+
+def encode_plan(plan: dict) -> bytes:
+    """Encode a plan response dict (PlanGenerateResponse / PlanRegenerateResponse fields)."""
+    blocks = plan["blocks"]
+    ids: Dict[str, int] = {}
+
+    def intern(task_id: str) -> int:
+        index = ids.get(task_id)
+        if index is None:
+            index = ids[task_id] = len(ids)
+        return index
+
+    block_ids, durations, types, task_offsets, split_offsets = [], [], bytearray(), [0], [0]
+    refs: List[int] = []
+    split_task, split_part, split_total = [], [], []
+    for block in blocks:
+        block_ids.append(block["blockId"])
+        durations.append(block["durationMinutes"])
+        types.append(BLOCK_TYPES.index(block["type"]))
+        refs.extend(intern(tid) for tid in block["tasks"])
+        task_offsets.append(len(refs))
+        for si in block.get("splitInfos") or ():
+            split_task.append(intern(si["originalTaskId"]))
+            split_part.append(si["part"])
+            split_total.append(si["totalParts"])
+        split_offsets.append(len(split_task))
+
+    encoded = [task_id.encode("utf-8") for task_id in ids]
+    id_offsets = [0]
+    for raw in encoded:
+        id_offsets.append(id_offsets[-1] + len(raw))
+
+    header = HEADER.pack(
+        MAGIC,
+        1 if plan.get("quickTaskUsed") else 0,
+        plan.get("totalDurationMinutes", sum(durations)),
+        len(blocks),
+        len(ids),
+        len(refs),
+        len(split_task),
+    )
+    return b"".join((
+        header,
+        _u32(id_offsets),
+        _pad(b"".join(encoded)),
+        _u32(block_ids),
+        _u32(durations),
+        _pad(bytes(types)),
+        _u32(task_offsets),
+        _u32(split_offsets),
+        _u32(refs),
+        _u32(split_task),
+        _u32(split_part),
+        _u32(split_total),
+    ))
+
+
+class PlanView:
+    """
+    Read-only view over an encoded plan. Only the header is parsed up front; blocks
+    and task ids are decoded on access.
+    """
+
+    def __init__(self, blob: bytes):
+        self._buf = memoryview(blob)
+        magic, flags, total, n_blocks, n_ids, n_refs, n_splits = HEADER.unpack_from(blob, 0)
+        if magic != MAGIC:
+            raise ValueError("not an encoded plan")
+        self.quickTaskUsed = bool(flags & 1)
+        self.totalDurationMinutes = total
+        self.totalBlocks = n_blocks
+
+        offset = HEADER.size
+        self._id_offsets = offset
+        offset += 4 * (n_ids + 1)
+        self._id_blob = offset
+        id_blob_len = struct.unpack_from("<I", blob, self._id_offsets + 4 * n_ids)[0]
+        offset += id_blob_len + (-id_blob_len % 4)
+        self._block_ids = offset
+        offset += 4 * n_blocks
+        self._durations = offset
+        offset += 4 * n_blocks
+        self._types = offset
+        offset += n_blocks + (-n_blocks % 4)
+        self._task_offsets = offset
+        offset += 4 * (n_blocks + 1)
+        self._split_offsets = offset
+        offset += 4 * (n_blocks + 1)
+        self._refs = offset
+        offset += 4 * n_refs
+        self._split_task = offset
+        offset += 4 * n_splits
+        self._split_part = offset
+        offset += 4 * n_splits
+        self._split_total = offset
+
+    def __len__(self) -> int:
+        return self.totalBlocks
+
+    def _at(self, section: int, index: int) -> int:
+        return struct.unpack_from("<I", self._buf, section + 4 * index)[0]
+
+    def task_id(self, index: int) -> str:
+        start = self._at(self._id_offsets, index)
+        end = self._at(self._id_offsets, index + 1)
+        return bytes(self._buf[self._id_blob + start:self._id_blob + end]).decode("utf-8")
+
+    def block(self, index: int) -> dict:
+        if not 0 <= index < self.totalBlocks:
+            raise IndexError(index)
+        tasks_from, tasks_to = self._at(self._task_offsets, index), self._at(self._task_offsets, index + 1)
+        splits_from, splits_to = self._at(self._split_offsets, index), self._at(self._split_offsets, index + 1)
+        split_infos: Optional[List[dict]] = [
+            {
+                "originalTaskId": self.task_id(self._at(self._split_task, i)),
+                "part": self._at(self._split_part, i),
+                "totalParts": self._at(self._split_total, i),
+            }
+            for i in range(splits_from, splits_to)
+        ] or None
+        return {
+            "blockId": self._at(self._block_ids, index),
+            "type": BLOCK_TYPES[self._buf[self._types + index]],
+            "durationMinutes": self._at(self._durations, index),
+            "tasks": [self.task_id(self._at(self._refs, i)) for i in range(tasks_from, tasks_to)],
+            "splitInfos": split_infos,
+        }
+
+    def find_block(self, block_id: int) -> Optional[dict]:
+        """Block by blockId; ids are sequential from 1, so this is normally a direct index."""
+        index = block_id - 1
+        if 0 <= index < self.totalBlocks and self._at(self._block_ids, index) == block_id:
+            return self.block(index)
+        for i in range(self.totalBlocks):
+            if self._at(self._block_ids, i) == block_id:
+                return self.block(i)
+        return None
+
+    def blocks(self) -> List[dict]:
+        return [self.block(i) for i in range(self.totalBlocks)]
+
+    def to_dict(self) -> dict:
+        return {
+            "blocks": self.blocks(),
+            "totalDurationMinutes": self.totalDurationMinutes,
+            "totalBlocks": self.totalBlocks,
+            "quickTaskUsed": self.quickTaskUsed,
+        }
@@ -0,0 +1,98 @@
+import json
+import os
+from functools import lru_cache
+from typing import Any, List, Tuple, Type, Union, get_args, get_origin
+
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, same compact output
+    orjson = None  # type: ignore[assignment]
+
+# How plan routes build their responses:
+#   models   PlanBlock/SplitInfo models all the way through (default)
+#   fast     plain dicts from the scheduler, validated once against the response model
+#   trusted  plain dicts, no validation; only for deployments that trust the planner output
+# Routes that always build dicts (candidates) validate them in both models and fast mode.
+RESPONSE_MODES = ("models", "fast", "trusted")
+PLAN_RESPONSE_MODE = (os.getenv("PLAN_RESPONSE_MODE") or "models").lower()
+if PLAN_RESPONSE_MODE not in RESPONSE_MODES:
+    raise ValueError(f"PLAN_RESPONSE_MODE must be one of {', '.join(RESPONSE_MODES)}")
+
+
+def use_plain_blocks() -> bool:
+    return PLAN_RESPONSE_MODE != "models"
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def render_plan(plan: Union[BaseModel, dict], response_model: Type[BaseModel]) -> bytes:
+    """
+    Serialize a plan built either as a response model or as a plain dict. Both produce
+    the same bytes, so cached bodies and ETags don't depend on the mode.
+    """
+    if isinstance(plan, BaseModel):
+        return plan.model_dump_json().encode("utf-8")
+    if PLAN_RESPONSE_MODE != "trusted":
+        validate_plan(plan, response_model)
+    return dumps(plan)
+
+
+# blocks validated per call in fast mode; bounds the throwaway models alive at once
+VALIDATE_CHUNK = 256
+
+
+@lru_cache(maxsize=None)
+def model_list_fields(model: Type[BaseModel]) -> Tuple[Tuple[str, Type[BaseModel], TypeAdapter], ...]:
+    """(field name, item model, List[item model] adapter) for the model's List[SomeModel] fields."""
+    fields: List[Tuple[str, Type[BaseModel], TypeAdapter]] = []
+    for name, field in model.model_fields.items():
+        args = get_args(field.annotation)
+        if get_origin(field.annotation) is list and args and isinstance(args[0], type) \
+                and issubclass(args[0], BaseModel):
+            fields.append((name, args[0], TypeAdapter(field.annotation)))
+    return tuple(fields)
+
+
+def validate_plan(plan: dict, model: Type[BaseModel]):
+    """
+    model.model_validate(plan) without keeping the whole model tree: list-of-model fields
+    (blocks, candidates) are validated a chunk at a time, so a large plan is checked
+    in roughly constant memory.
+    """
+    shallow = plan
+    for name, item_model, list_adapter in model_list_fields(model):
+        items = plan.get(name)
+        if not isinstance(items, list):
+            continue
+        if shallow is plan:
+            shallow = dict(plan)
+        shallow[name] = []
+        if model_list_fields(item_model):
+            # nested plans (candidates): recurse so their blocks are chunked too
+            for item in items:
+                if isinstance(item, dict):
+                    validate_plan(item, item_model)
+                else:
+                    item_model.model_validate(item)
+        else:
+            for start in range(0, len(items), VALIDATE_CHUNK):
+                list_adapter.validate_python(items[start:start + VALIDATE_CHUNK])
+    model.model_validate(shallow)
+
+
+class PlanJSONResponse(Response):
+    """JSON response that passes pre-serialized bodies through and encodes anything else with orjson."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -0,0 +1,53 @@
+from typing import Dict, Iterable
+
+from models.plan import Task
+from services.categories import CategoryClassifier
+from services.category_cache import category_cache
+
+# score = anchor difficulty - switches per work block - breaks per block, weighted
+ANCHOR_WEIGHT = 1.0
+SWITCH_WEIGHT = 2.0
+BREAK_WEIGHT = 1.0
+
+
+def plan_quality(plan: dict, tasks: Iterable[Task], categories: CategoryClassifier) -> dict:
+    """
+    Cheap quality score for a plan dict (plain-block shape): fewer context switches
+    and breaks, and a harder anchor task up front, score higher.
+    """
+    tasks_by_id: Dict[str, Task] = {t.id: t for t in tasks}
+    blocks = plan["blocks"]
+
+    switches = 0
+    breaks = 0
+    work_blocks = 0
+    anchor_difficulty = 0
+    previous = None
+    for block in blocks:
+        if block["type"] == "break":
+            breaks += 1
+            continue
+        work_blocks += 1
+        if not anchor_difficulty and block["splitInfos"]:
+            anchor = tasks_by_id.get(block["splitInfos"][0]["originalTaskId"])
+            anchor_difficulty = anchor.difficulty if anchor else 0
+        for tid in block["tasks"]:
+            task = tasks_by_id.get(tid)
+            if task is None:
+                continue
+            category = category_cache.classify(task.name, task.description, categories)
+            if previous is not None and category != previous:
+                switches += 1
+            previous = category
+
+    score = (
+        ANCHOR_WEIGHT * anchor_difficulty
+        - SWITCH_WEIGHT * switches / max(1, work_blocks)
+        - BREAK_WEIGHT * breaks / max(1, len(blocks))
+    )
+    return {
+        "score": round(score, 4),
+        "categorySwitches": switches,
+        "breaks": breaks,
+        "anchorDifficulty": anchor_difficulty,
+    }
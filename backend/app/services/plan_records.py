@@ -0,0 +1,41 @@
+"""
+Slotted records for the scheduler's internal state.
+
+A TaskChunk per split part and an OpenWorkBlock per work block are created for every
+request; as slotted dataclasses they carry no per-instance __dict__. Only finalized
+blocks become PlanBlock models (or plain dicts in the PLAN_RESPONSE_MODE fast path),
+so nothing here reaches the response.
+
+Scope: these records are a small share of a request's memory. In models mode (the
+default) the scheduler still emits PlanBlock/SplitInfo models, since they are the
+response, and that tree sets the peak, so it is no lower than before. The fast and
+trusted modes build no Pydantic model while planning and validate the response a
+chunk at a time at the boundary (plan_json.validate_plan); that, not the records, is
+where their lower peak comes from. tests/test_plan_memory.py measures both modes
+against the reference planner.
+"""
+from dataclasses import dataclass
+from typing import List, Set, Tuple
+
+from models.plan import Task
+
+
+@dataclass(slots=True)
+class TaskChunk:
+    """A part of a Task being scheduled, with its split metadata."""
+    task: Task          # original task object (for id, priority, ... read-only)
+    remaining: int      # remaining minutes in this chunk (duration of this chunk)
+    total_parts: int    # how many parts the original task is split into
+    next_part: int      # 1-based index for this chunk (which part it is)
+
+
+@dataclass(slots=True)
+class OpenWorkBlock:
+    """The work block being filled; becomes a PlanBlock (or dict) when finalized."""
+    blockId: int
+    durationMinutes: int
+    tasks: List[str]    # strings from the scheduler's id table, shared rather than copied
+    # (task index, part, totalParts) per split chunk in insertion order, and the same
+    # keys as a set for dedup; indexes are into the scheduler's task_ids
+    splits: List[Tuple[int, int, int]]
+    split_keys: Set[Tuple[int, int, int]]
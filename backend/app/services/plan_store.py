@@ -0,0 +1,42 @@
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import select
+
+from core.auth import AuthUser
+from core.database import session_scope
+from models import Plan
+from services.plan_codec import encode_plan
+from services.users import ensure_user
+
+logger = logging.getLogger(__name__)
+
+async def save_plan(user: AuthUser, body: bytes, kind: str, task_hash: str, seed: Optional[int] = None):
+    """
+    Persist a served plan (runs as a background task after the response is sent).
+
+    Plans are stored in the compact binary encoding. A plan whose input hash the user
+    already has is not stored twice; the existing row is just marked as the latest.
+    """
+    try:
+        async with session_scope() as session:
+            existing = (await session.exec(
+                select(Plan).where(Plan.user_id == user.id, Plan.task_hash == task_hash).limit(1)
+            )).first()
+            if existing is not None:
+                existing.created_at = datetime.utcnow()
+                session.add(existing)
+            else:
+                await ensure_user(session, user)
+                session.add(Plan(
+                    user_id=user.id,
+                    blob=encode_plan(json.loads(body)),
+                    kind=kind,
+                    seed=seed,
+                    task_hash=task_hash,
+                ))
+            await session.commit()
+    except Exception:
+        logger.exception("Failed to persist %s plan for user %s", kind, user.id)
@@ -0,0 +1,97 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from models.plan import SchedulingProfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = SchedulingProfile()
+
+BUILTIN_PROFILES: Dict[str, SchedulingProfile] = {
+    "default": DEFAULT_PROFILE,
+    "pomodoro": SchedulingProfile(
+        blockLength=50, shortBreak=10, longBreak=30, continuousWorkThreshold=50
+    ),
+    "deep-work": SchedulingProfile(
+        blockLength=90, shortBreak=15, longBreak=30, longBreakEvery=2,
+        continuousWorkThreshold=90, quickTaskMinutes=15,
+    ),
+}
+
+
+class UnknownProfileError(ValueError):
+    pass
+
+
+class ProfileRegistry:
+    """
+    Named scheduling profiles and the tenant -> profile mapping.
+
+    The optional profiles file is JSON:
+
+        {"profiles": {"name": {...timings}}, "tenants": {"tenant-id": "name" or {...timings}}}
+
+    It is read and validated once, on first use; every profile is a frozen
+    SchedulingProfile, so resolved profiles can key caches directly.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._profiles: Optional[Dict[str, SchedulingProfile]] = None
+        self._tenants: Dict[str, SchedulingProfile] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, SchedulingProfile]:
+        profiles = dict(BUILTIN_PROFILES)
+        tenants: Dict[str, SchedulingProfile] = {}
+        if self.path is not None:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            for name, timings in (data.get("profiles") or {}).items():
+                profiles[name] = SchedulingProfile.model_validate(timings)
+            for tenant, value in (data.get("tenants") or {}).items():
+                if isinstance(value, str):
+                    if value not in profiles:
+                        raise ValueError(f"tenant '{tenant}' uses unknown profile '{value}'")
+                    tenants[tenant] = profiles[value]
+                else:
+                    tenants[tenant] = SchedulingProfile.model_validate(value)
+            logger.info("Loaded %d scheduling profiles and %d tenants from %s",
+                        len(profiles), len(tenants), self.path)
+        with self._lock:
+            self._profiles = profiles
+            self._tenants = tenants
+        return profiles
+
+    def _ensure_loaded(self) -> Dict[str, SchedulingProfile]:
+        profiles = self._profiles
+        if profiles is None:
+            profiles = self.load()
+        return profiles
+
+    def named(self, name: str) -> SchedulingProfile:
+        profile = self._ensure_loaded().get(name)
+        if profile is None:
+            raise UnknownProfileError(f"Unknown scheduling profile '{name}'")
+        return profile
+
+    def resolve(
+        self, requested: Union[str, SchedulingProfile, None], tenant: Optional[str] = None
+    ) -> SchedulingProfile:
+        """The request's profile if given, else the tenant's, else the default."""
+        if isinstance(requested, SchedulingProfile):
+            return requested
+        if requested is not None:
+            return self.named(requested)
+        if tenant:
+            self._ensure_loaded()
+            return self._tenants.get(tenant, DEFAULT_PROFILE)
+        return DEFAULT_PROFILE
+
+
+profile_registry = ProfileRegistry(
+    Path(os.environ["SCHEDULING_PROFILES_FILE"]) if os.getenv("SCHEDULING_PROFILES_FILE") else None
+)
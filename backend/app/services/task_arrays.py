@@ -0,0 +1,111 @@
+"""
+Optional NumPy path for task filtering, scoring and sorting.
+
+Task fields are packed into arrays once per request; filtering, quick/normal
+partitioning, scoring, regenerate's noise and the sorts then run as array
+operations, and only the final orderings are turned back into Task lists.
+
+Orderings match the pure-Python helpers exactly: np.lexsort is stable, like
+sorted(), so ties keep their input order, and noise is drawn from the request's
+random.Random in task order with the same arithmetic as Random.uniform.
+"""
+import importlib.util
+import os
+from typing import Any, List, Optional, Sequence, Tuple
+
+from models.plan import Task
+
+# NumPy is imported on the first large request rather than at startup
+np: Any = None
+HAVE_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# below this many tasks the array setup costs more than it saves
+VECTORIZE_MIN_TASKS = int(os.getenv("PLAN_VECTORIZE_MIN_TASKS") or 512)
+
+
+def should_vectorize(tasks: Sequence[Task]) -> bool:
+    global np
+    if not HAVE_NUMPY or VECTORIZE_MIN_TASKS <= 0 or len(tasks) < VECTORIZE_MIN_TASKS:
+        return False
+    if np is None:
+        import numpy
+        np = numpy
+    return True
+
+
+class TaskArrays:
+    """priority, difficulty, durationMinutes and status of a task list as int64 arrays."""
+
+    __slots__ = ("tasks", "priority", "difficulty", "duration", "status")
+
+    def __init__(self, tasks: Sequence[Task]):
+        count = len(tasks)
+        self.tasks = tasks
+        self.priority = np.fromiter((t.priority for t in tasks), dtype=np.int64, count=count)
+        self.difficulty = np.fromiter((t.difficulty for t in tasks), dtype=np.int64, count=count)
+        self.duration = np.fromiter((t.durationMinutes for t in tasks), dtype=np.int64, count=count)
+        self.status = np.fromiter((t.status for t in tasks), dtype=np.int64, count=count)
+
+    def scores(self):
+        # compute_score
+        return self.priority * 2 + self.difficulty
+
+    def take(self, index) -> List[Task]:
+        tasks = self.tasks
+        return [tasks[i] for i in index.tolist()]
+
+    def sort_order(self, index, scores):
+        """index reordered like sort_tasks: score, then duration, descending; ties stable."""
+        return index[np.lexsort((-self.duration[index], -scores[index]))]
+
+
+def pack(tasks: Sequence[Task]) -> Optional[TaskArrays]:
+    """TaskArrays for the list, or None when a value doesn't fit in int64."""
+    try:
+        return TaskArrays(tasks)
+    except OverflowError:
+        return None
+
+
+def partition_sorted(
+    arrays: TaskArrays, quick_minutes: int, preserve_order: bool
+) -> Tuple[Optional[Task], List[Task], List[Task]]:
+    """
+    prepare_tasks' filtering and sorting: drop status 2/3, split quick vs normal, pick
+    the quick motivation, and sort both lists unless preserve_order is set.
+    Returns (quick_motivation, quick_tasks, normal_tasks).
+    """
+    active = (arrays.status != 2) & (arrays.status != 3)
+    quick_mask = arrays.duration <= quick_minutes
+    quick_index = np.flatnonzero(active & quick_mask)
+    normal_index = np.flatnonzero(active & ~quick_mask)
+    scores = arrays.scores()
+
+    quick_motivation = None
+    if quick_index.size:
+        quick_sorted = arrays.sort_order(quick_index, scores)
+        quick_motivation = arrays.tasks[int(quick_sorted[0])]
+        if preserve_order:
+            quick_index = quick_index[quick_index != quick_sorted[0]]
+        else:
+            # the rest of a stable sort is the stable sort of the rest
+            quick_index = quick_sorted[1:]
+
+    if not preserve_order:
+        normal_index = arrays.sort_order(normal_index, scores)
+
+    return quick_motivation, arrays.take(quick_index), arrays.take(normal_index)
+
+
+def noisy_order(arrays: TaskArrays, rng, randomness: float) -> List[Task]:
+    """
+    Regenerate's noisy_score sort: base * (1 + uniform(-randomness, randomness)),
+    descending. One rng.random() per task in order, as uniform() would draw them.
+    """
+    count = len(arrays.tasks)
+    draws = np.fromiter((rng.random() for _ in range(count)), dtype=np.float64, count=count)
+    base = arrays.scores()
+    low, high = -randomness, randomness
+    noise = (low + (high - low) * draws) * base
+    values = base + noise
+    return arrays.take(np.argsort(-values, kind="stable"))
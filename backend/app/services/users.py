@@ -0,0 +1,12 @@
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.auth import AuthUser
+from core.database import dialect_insert
+from models import User
+
+async def ensure_user(session: AsyncSession, user: AuthUser):
+    """Create the user row on first write; owned rows reference it by foreign key."""
+    insert = dialect_insert(session)
+    await session.exec(
+        insert(User).values(id=user.id, email=user.email).on_conflict_do_nothing(index_elements=["id"])
+    )
@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# worker processes for CPU-bound planning; 0 or 1 means "run inline"
+PLAN_WORKERS = int(os.getenv("PLAN_WORKERS") or os.cpu_count() or 1)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _warm_worker():
+    # index categories and load profiles and the planner once per worker instead of on its first task
+    import api.routes.plan  # noqa: F401
+    from services.category_registry import category_registry
+    from services.profiles import profile_registry
+    category_registry.current()
+    profile_registry.load()
+
+
+def _noop():
+    pass
+
+
+def _pool_context():
+    # The pool is usually created from a request thread, and forking a process that
+    # has other threads running can deadlock the child on a lock held mid-fork.
+    # Workers come from a single-threaded fork server instead (spawn where there is none).
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        # imported once in the fork server, so every worker starts with the planner loaded
+        ctx.set_forkserver_preload(["api.routes.plan"])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared planning pool, created on first use. None when PLAN_WORKERS <= 1."""
+    global _pool
+    if PLAN_WORKERS <= 1:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=PLAN_WORKERS, mp_context=_pool_context(), initializer=_warm_worker
+                )
+    return _pool
+
+
+def warm_process_pool():
+    """Start every worker now (they are otherwise spawned on demand), without waiting for them."""
+    pool = get_process_pool()
+    if pool is not None:
+        for _ in range(PLAN_WORKERS):
+            pool.submit(_noop)
+
+
+def shutdown_process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            # wait for the workers to exit; otherwise the server can exit before the pool
+            # stops them, leaving the workers and the fork server running
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,204 @@
+"""
+Planner micro-benchmarks.
+
+Times build_plan, build_regenerated_plan, apply_context_grouping and get_task_category
+on synthetic task populations, and compares the results with a stored JSON baseline.
+With --memory it also records the tracemalloc peak of one generate request (plan built
+and rendered to the response body) with model blocks and with plain record blocks.
+
+    cd backend
+    python benchmarks/bench_planner.py                      # run and compare with baseline.json
+    python benchmarks/bench_planner.py --save-baseline      # record a new baseline
+    python benchmarks/bench_planner.py --sizes 10,1000 --quick-ratio 0.6 --keyword-density 0.8
+    python benchmarks/bench_planner.py --memory --sizes 1000,10000
+
+Exits with status 1 when any p50 latency (or recorded peak memory) regresses past
+--threshold (default 25%).
+Baselines are machine-specific; re-record them on the machine that runs the comparison.
+"""
+import argparse
+import gc
+import json
+import math
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+sys.path.insert(0, str(APP_DIR))
+
+from api.routes.plan import (  # noqa: E402
+    apply_context_grouping,
+    build_plan,
+    build_regenerated_plan,
+    get_task_category,
+)
+from data.categories import CATEGORIES  # noqa: E402
+from models.plan import PlanGenerateRequest, PlanGenerateResponse, PlanRegenerateRequest, Task  # noqa: E402
+from services.category_cache import category_cache  # noqa: E402
+from services.category_registry import category_registry  # noqa: E402
+from services.plan_json import render_plan  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+KEYWORDS = [kw for keywords in CATEGORIES.values() for kw in keywords]
+FILLER = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet"]
+
+
+def make_tasks(n: int, rnd: random.Random, quick_ratio: float, durations: str, keyword_density: float):
+    tasks = []
+    for i in range(n):
+        if rnd.random() < quick_ratio:
+            duration = rnd.randint(1, 10)
+        elif durations == "lognormal":
+            duration = max(11, min(480, int(rnd.lognormvariate(3.6, 0.7))))
+        else:
+            duration = rnd.randint(11, 180)
+
+        words = [rnd.choice(KEYWORDS) if rnd.random() < keyword_density else rnd.choice(FILLER)
+                 for _ in range(rnd.randint(2, 6))]
+        tasks.append(Task(
+            id=f"t{i}",
+            name=" ".join(words[:3]),
+            description=" ".join(words[3:]) or None,
+            priority=rnd.randint(1, 3),
+            difficulty=rnd.randint(1, 3),
+            durationMinutes=duration,
+            status=rnd.choice((0, 0, 0, 0, 1, 2)),
+        ))
+    return tasks
+
+
+def time_calls(fn, repeat: int, warm_cache: bool):
+    samples = []
+    for _ in range(repeat):
+        if not warm_cache:
+            category_cache.clear()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def peak_memory(fn) -> int:
+    """Peak bytes allocated during one call, as traced by tracemalloc."""
+    fn()  # lazy imports and caches are not part of a request's footprint
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    # nearest-rank percentile
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run(args) -> dict:
+    classifier = category_registry.current()
+    results = {}
+    for size in args.sizes:
+        rnd = random.Random(args.seed + size)
+        tasks = make_tasks(size, rnd, args.quick_ratio, args.durations, args.keyword_density)
+        repeat = args.repeat if size <= 1000 else max(3, args.repeat // 3)
+        generate_req = PlanGenerateRequest(tasks=tasks)
+        regenerate_req = PlanRegenerateRequest(tasks=tasks, seed=args.seed)
+
+        cases = {
+            "generate_plan": lambda: build_plan(generate_req),
+            "regenerate_plan": lambda: build_regenerated_plan(regenerate_req),
+            "apply_context_grouping": lambda: apply_context_grouping(tasks, classifier),
+            "get_task_category": lambda: [get_task_category(t, classifier) for t in tasks],
+        }
+        for name, fn in cases.items():
+            samples = time_calls(fn, repeat, args.warm_cache)
+            p50 = statistics.median(samples)
+            key = f"{name}[{size}]"
+            results[key] = {
+                "tasks": size,
+                "repeat": repeat,
+                "p50_ms": round(p50 * 1000, 4),
+                "p99_ms": round(percentile(samples, 99) * 1000, 4),
+                "tasks_per_s": round(size / p50) if p50 > 0 else None,
+            }
+            r = results[key]
+            print(f"{key:<34} p50 {r['p50_ms']:>10.3f} ms   p99 {r['p99_ms']:>10.3f} ms   "
+                  f"{r['tasks_per_s'] or 0:>12,} tasks/s")
+
+        if args.memory:
+            for mode, plain in (("models", False), ("plain", True)):
+                key = f"generate_plan_memory[{mode}][{size}]"
+                peak = peak_memory(lambda: render_plan(build_plan(generate_req, plain=plain), PlanGenerateResponse))
+                results[key] = {"tasks": size, "peak_kib": round(peak / 1024)}
+                print(f"{key:<34} peak {results[key]['peak_kib']:>10,} KiB")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        for metric, unit in (("p50_ms", "ms"), ("peak_kib", "KiB")):
+            if not previous.get(metric) or metric not in current:
+                continue
+            change = current[metric] / previous[metric] - 1
+            if change > threshold:
+                regressions.append(f"{key}: {metric} {previous[metric]} {unit} -> {current[metric]} {unit} (+{change:.0%})")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000,10000,50000",
+                        type=lambda s: [int(x) for x in s.split(",")], help="task counts to benchmark")
+    parser.add_argument("--quick-ratio", type=float, default=0.3, help="share of tasks <= 10 minutes")
+    parser.add_argument("--durations", choices=("uniform", "lognormal"), default="lognormal",
+                        help="distribution of normal task durations")
+    parser.add_argument("--keyword-density", type=float, default=0.5,
+                        help="share of task words that are category keywords")
+    parser.add_argument("--repeat", type=int, default=15, help="samples per case (fewer above 1000 tasks)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="keep the category memo between samples instead of clearing it")
+    parser.add_argument("--memory", action="store_true",
+                        help="also record the tracemalloc peak of a generate request per size")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown before failing")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = run(args)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+    if regressions:
+        print("\nRegressions beyond threshold:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nNo regressions beyond threshold.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Plan response serialization benchmark.
+
+Compares the per-request cost of turning a scheduled plan into response bytes for
+each PLAN_RESPONSE_MODE, on synthetic task lists sized to produce ~N blocks:
+
+    fastapi   models, re-validated against response_model and encoded with json.dumps
+              (what returning the model from the route costs)
+    models    models, serialized with model_dump_json (the default mode)
+    fast      plain dicts, validated once, encoded with orjson
+    trusted   plain dicts, encoded with orjson
+
+    cd backend
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --blocks 100,500,2000 --repeat 50
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+sys.path.insert(0, str(APP_DIR))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from api.routes.plan import build_plan  # noqa: E402
+from bench_planner import make_tasks, percentile  # noqa: E402
+from models.plan import PlanGenerateRequest, PlanGenerateResponse  # noqa: E402
+from services.plan_json import dumps, orjson  # noqa: E402
+
+RESPONSE_ADAPTER = TypeAdapter(PlanGenerateResponse)
+
+
+def request_for_blocks(target: int, seed: int) -> PlanGenerateRequest:
+    """Smallest synthetic request whose plan has at least `target` blocks."""
+    rnd = random.Random(seed)
+    tasks = make_tasks(target * 2, rnd, 0.3, "lognormal", 0.5)
+    low, high = 1, len(tasks)
+    while low < high:
+        mid = (low + high) // 2
+        if build_plan(PlanGenerateRequest(tasks=tasks[:mid]), plain=True)["totalBlocks"] >= target:
+            high = mid
+        else:
+            low = mid + 1
+    return PlanGenerateRequest(tasks=tasks[:low])
+
+
+def fastapi_serialize(plan: PlanGenerateResponse) -> bytes:
+    # FastAPI's response_model handling: validate, dump to JSON-able data, json.dumps
+    content = jsonable_encoder(RESPONSE_ADAPTER.dump_python(RESPONSE_ADAPTER.validate_python(plan), mode="json"))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+MODES = {
+    "fastapi": (False, fastapi_serialize),
+    "models": (False, lambda plan: plan.model_dump_json().encode("utf-8")),
+    "fast": (True, lambda plan: (PlanGenerateResponse.model_validate(plan), dumps(plan))[1]),
+    "trusted": (True, dumps),
+}
+
+
+def time_ms(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), percentile(samples, 99)
+
+
+def run(args):
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'stdlib json'}")
+    for target in args.blocks:
+        request = request_for_blocks(target, args.seed + target)
+        reference = None
+        for mode, (plain, serialize) in MODES.items():
+            plan = build_plan(request, plain=plain)
+            body = serialize(plan)
+            reference = reference or body
+            same = json.loads(body) == json.loads(reference)
+            build_p50, _ = time_ms(lambda: build_plan(request, plain=plain), args.repeat)
+            ser_p50, ser_p99 = time_ms(lambda: serialize(plan), args.repeat)
+            blocks = len(plan["blocks"]) if plain else len(plan.blocks)
+            print(f"{mode:<8} [{blocks} blocks, {len(request.tasks)} tasks]  "
+                  f"build p50 {build_p50:>8.3f} ms   serialize p50 {ser_p50:>8.3f} ms  p99 {ser_p99:>8.3f} ms   "
+                  f"total {build_p50 + ser_p50:>8.3f} ms   {len(body):>8,} bytes{'' if same else '   MISMATCH'}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", default="500", type=lambda s: [int(x) for x in s.split(",")],
+                        help="target plan sizes in blocks")
+    parser.add_argument("--repeat", type=int, default=30, help="samples per case")
+    parser.add_argument("--seed", type=int, default=1234)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    run(parse_args(argv))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Small-request benchmark.
+
+p50 latency of generate requests for a few tasks, with the small-input fast path
+(PLAN_SMALL_MAX_TASKS, default 10) and with every size sent through the general engine:
+
+    engine    build and render in-process (what the plan executor runs per request)
+    http      POST /plan/generate against a local uvicorn, response cache disabled
+              (adds the inline vs. executor dispatch; only with --http)
+
+Task lists come in three shapes: mixed (bench_planner's population), single (one
+normal task) and quick (micro-tasks only).
+
+    cd backend
+    python benchmarks/bench_small_plans.py
+    python benchmarks/bench_small_plans.py --sizes 1,5,10,50 --http
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+sys.path.insert(0, str(APP_DIR))
+
+import services.executor as executor  # noqa: E402
+from api.routes.plan import build_plan, render_built  # noqa: E402
+from bench_planner import make_tasks  # noqa: E402
+from bench_startup import free_port  # noqa: E402
+from models.plan import PlanGenerateRequest, PlanGenerateResponse, Task  # noqa: E402
+from services.plan_json import use_plain_blocks  # noqa: E402
+
+ENGINES = {"small": 10, "general": 0}  # PLAN_SMALL_MAX_TASKS per engine
+
+
+def shaped_tasks(shape: str, size: int, seed: int):
+    rnd = random.Random(seed)
+    if shape == "mixed":
+        return make_tasks(size, rnd, 0.3, "lognormal", 0.5)
+    if shape == "single":
+        return make_tasks(1, rnd, 0.0, "lognormal", 0.5)
+    return [Task(id=f"q{i}", name=f"quick {i}", priority=rnd.randint(1, 3), difficulty=rnd.randint(1, 3),
+                 durationMinutes=rnd.randint(1, 10), status=0) for i in range(size)]
+
+
+def cases(sizes, seed: int):
+    for size in sizes:
+        yield "mixed", size, shaped_tasks("mixed", size, seed + size)
+        if size == 1:
+            yield "single", size, shaped_tasks("single", size, seed)
+        yield "quick", size, shaped_tasks("quick", size, seed + size)
+
+
+def time_engines(request: PlanGenerateRequest, repeat: int) -> dict:
+    """p50 ms per engine; samples alternate between engines so machine noise hits both alike."""
+    plain = use_plain_blocks()
+    samples = {engine: [] for engine in ENGINES}
+    for n in range(repeat + repeat // 10 + 1):
+        for engine, small_max in ENGINES.items():
+            executor.SMALL_PLAN_MAX_TASKS = small_max
+            start = time.perf_counter()
+            render_built(build_plan, PlanGenerateResponse, request, False, plain, None)
+            if n > repeat // 10:
+                samples[engine].append(time.perf_counter() - start)
+    return {engine: statistics.median(s) * 1000 for engine, s in samples.items()}
+
+
+def start_server(small_max: int):
+    port = free_port()
+    env = dict(os.environ, PLAN_SMALL_MAX_TASKS=str(small_max), PLAN_CACHE_MAX_ENTRIES="0")
+    env.pop("DATABASE_URL", None)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1)
+            return proc, port
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise TimeoutError("server did not start")
+
+
+def time_http(port: int, request: PlanGenerateRequest, repeat: int) -> float:
+    body = json.dumps({"tasks": [t.model_dump() for t in request.tasks]}).encode()
+    conn = http.client.HTTPConnection("127.0.0.1", port)  # keep-alive: time the request, not the connect
+    samples = []
+    try:
+        for n in range(repeat + repeat // 10 + 1):
+            start = time.perf_counter()
+            conn.request("POST", "/plan/generate", body, {"Content-Type": "application/json"})
+            conn.getresponse().read()
+            if n > repeat // 10:
+                samples.append(time.perf_counter() - start)
+    finally:
+        conn.close()
+    return statistics.median(samples) * 1000
+
+
+def run(args):
+    requests = [(shape, size, PlanGenerateRequest(tasks=tasks)) for shape, size, tasks in cases(args.sizes, args.seed)]
+    results = {}
+    for shape, size, request in requests:
+        for engine, p50 in time_engines(request, args.repeat).items():
+            results[(shape, size, engine, "engine")] = p50
+    for engine, small_max in ENGINES.items():
+        if args.http:
+            proc, port = start_server(small_max)
+            try:
+                for shape, size, request in requests:
+                    results[(shape, size, engine, "http")] = time_http(port, request, max(200, args.repeat // 4))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+
+    kinds = ("engine", "http") if args.http else ("engine",)
+    for shape, size, _ in requests:
+        line = f"{shape:<6} [{size:>3} tasks]"
+        for kind in kinds:
+            small, general = results[(shape, size, "small", kind)], results[(shape, size, "general", kind)]
+            line += f"   {kind} p50 small {small:>8.3f} ms  general {general:>8.3f} ms  ({general / small:>4.2f}x)"
+        print(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,5,10,50", type=lambda s: [int(x) for x in s.split(",")],
+                        help="task counts to benchmark")
+    parser.add_argument("--repeat", type=int, default=2000, help="in-process samples per case")
+    parser.add_argument("--http", action="store_true", help="also time requests against a local server")
+    parser.add_argument("--seed", type=int, default=1234)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    run(parse_args(argv))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Cold-start benchmark.
+
+Measures, in fresh processes:
+
+    import      time to `import main` (app construction included)
+    first /health
+                time from launching uvicorn until the first /health response
+
+    cd backend
+    python benchmarks/bench_startup.py                     # planner-only (no DATABASE_URL)
+    python benchmarks/bench_startup.py --database-url sqlite://
+    python benchmarks/bench_startup.py --repeat 10
+
+Each sample is a new interpreter, so the numbers include module imports, category
+indexing and the lifespan hook, which is what a cold start on a fresh instance pays.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def child_env(database_url):
+    env = dict(os.environ)
+    env.pop("DATABASE_URL", None)
+    if database_url:
+        env["DATABASE_URL"] = database_url
+    return env
+
+
+def time_import(env) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=APP_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_first_health(env, timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/health"
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        raise TimeoutError(f"/health did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def report(name: str, samples):
+    ms = sorted(s * 1000 for s in samples)
+    print(f"{name:<14} p50 {statistics.median(ms):>8.1f} ms   min {ms[0]:>8.1f} ms   max {ms[-1]:>8.1f} ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes per measurement")
+    parser.add_argument("--database-url", default=None, help="DATABASE_URL for the app (default: none)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for /health")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    env = child_env(args.database_url)
+    print(f"database: {args.database_url or 'not configured'}")
+    report("import", [time_import(env) for _ in range(args.repeat)])
+    report("first /health", [time_first_health(env, args.timeout) for _ in range(args.repeat)])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
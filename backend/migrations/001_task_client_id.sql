@@ -0,0 +1,7 @@
+-- Client-generated task ids (POST /tasks/bulk) and the keyset pagination indexes.
+-- Applied at startup by core.database.upgrade_schema; kept here for databases whose
+-- schema is managed by hand. PostgreSQL syntax; every statement is safe to rerun.
+ALTER TABLE task ADD COLUMN IF NOT EXISTS client_id VARCHAR;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_task_user_id_client_id ON task (user_id, client_id);
+CREATE INDEX IF NOT EXISTS ix_task_user_id_id ON task (user_id, id);
+CREATE INDEX IF NOT EXISTS ix_task_user_id_completed_id ON task (user_id, completed, id);
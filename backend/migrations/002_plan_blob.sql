@@ -0,0 +1,9 @@
+-- Served plans stored in the plan_codec encoding, with their kind, seed and input hash.
+-- Applied at startup by core.database.upgrade_schema; kept here for databases whose
+-- schema is managed by hand. PostgreSQL syntax; every statement is safe to rerun.
+ALTER TABLE plan ADD COLUMN IF NOT EXISTS blob BYTEA;
+ALTER TABLE plan ADD COLUMN IF NOT EXISTS kind VARCHAR NOT NULL DEFAULT 'generate';
+ALTER TABLE plan ADD COLUMN IF NOT EXISTS seed INTEGER;
+ALTER TABLE plan ADD COLUMN IF NOT EXISTS task_hash VARCHAR;
+CREATE INDEX IF NOT EXISTS ix_plan_user_id_created_at ON plan (user_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_plan_user_id_task_hash ON plan (user_id, task_hash);
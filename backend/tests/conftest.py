@@ -0,0 +1,70 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+sys.path.insert(0, str(APP_DIR))
+
+from data.categories import CATEGORIES  # noqa: E402
+from services.category_registry import category_registry  # noqa: E402
+
+
+@pytest.fixture
+def single_word_categories(tmp_path, monkeypatch):
+    """
+    The bundled categories without multi-word phrases, as the active table. The
+    reference planner only matches single tokens, so only on these do both agree.
+    """
+    table = {category: [k for k in keywords if " " not in k] for category, keywords in CATEGORIES.items()}
+    path = tmp_path / "categories.json"
+    path.write_text(json.dumps(table))
+    monkeypatch.setattr(category_registry, "path", path)
+    category_registry.load()
+    yield table
+    monkeypatch.undo()
+    category_registry.load()
+
+
+JWT_SECRET = "test-secret"
+
+
+def auth_header(user_id: str, email: str = "") -> dict:
+    import time
+
+    import jwt
+
+    claims = {"sub": user_id, "email": email or f"{user_id}@example.com", "aud": "authenticated",
+              "exp": int(time.time()) + 3600}
+    return {"Authorization": "Bearer " + jwt.encode(claims, JWT_SECRET, algorithm="HS256")}
+
+
+@pytest.fixture
+def database_url():
+    """Overridden by tests that need a database other than a fresh in-memory one."""
+    return "sqlite://"
+
+
+@pytest.fixture
+def db_client(monkeypatch, database_url):
+    """TestClient for the database-backed routers, on a fresh in-memory SQLite database by default."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api.routes import plans, session, tasks
+    from core.config import get_settings
+    from core.database import dispose_engine
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.setenv("SUPABASE_JWT_SECRET", JWT_SECRET)
+    get_settings.cache_clear()
+
+    app = FastAPI()
+    for module in (tasks, session, plans):
+        app.include_router(module.router)
+    with TestClient(app) as client:
+        yield client
+        client.portal.call(dispose_engine)
+    monkeypatch.undo()
+    get_settings.cache_clear()
@@ -0,0 +1,151 @@
+"""RedisCache and PlanCache against an in-memory Redis server, plus the LocalCache-backed category memo."""
+import asyncio
+import json
+
+import pytest
+
+from services import cache_backend
+from services.cache_backend import RAW, ZLIB, RedisCache
+from services.category_cache import CategoryCache
+from services.plan_cache import PlanCache
+
+
+@pytest.fixture
+def server():
+    """An in-memory Redis server; the tests using it skip without fakeredis (requirements-dev.txt)."""
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeServer()
+
+
+def redis_cache(server, monkeypatch) -> RedisCache:
+    """A RedisCache talking to the fake server; each one stands for a separate worker."""
+    import fakeredis.aioredis
+
+    cache = RedisCache("redis://fake")
+    client = fakeredis.aioredis.FakeRedis(server=server)
+    monkeypatch.setattr(cache, "_redis", lambda: client)
+    return cache
+
+
+def test_envelope(server, monkeypatch):
+    cache = redis_cache(server, monkeypatch)
+    small = b"x" * 10
+    large = json.dumps([{"id": i, "name": "write report"} for i in range(200)]).encode()
+
+    async def scenario():
+        raw = cache._redis()
+        await cache.set("k:small", small)
+        await cache.set("k:large", large)
+        await raw.set("k:future", b"\x07whatever")
+        stored_small, stored_large = await raw.get("k:small"), await raw.get("k:large")
+        return stored_small, stored_large, await cache.get("k:small"), await cache.get("k:large"), await cache.get("k:future")
+
+    stored_small, stored_large, got_small, got_large, got_future = asyncio.run(scenario())
+    assert stored_small == RAW + small
+    assert stored_large[:1] == ZLIB and len(stored_large) < len(large)
+    assert got_small == small and got_large == large
+    # an envelope this version can't read is a miss, not an error
+    assert got_future is None
+    assert cache.errors == 0
+
+
+def test_ttl_expires_entries(server, monkeypatch):
+    cache = redis_cache(server, monkeypatch)
+
+    async def scenario():
+        await cache.set("k", b"v", ttl=0.05)
+        fresh = await cache.get("k")
+        await asyncio.sleep(0.1)
+        return fresh, await cache.get("k")
+
+    assert asyncio.run(scenario()) == (b"v", None)
+
+
+def test_add_is_set_if_absent(server, monkeypatch):
+    cache = redis_cache(server, monkeypatch)
+
+    async def scenario():
+        return await cache.add("lease", b"1", 1), await cache.add("lease", b"1", 1)
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_single_flight_in_process(server, monkeypatch):
+    plans = PlanCache(redis_cache(server, monkeypatch))
+    builds = []
+
+    async def build():
+        builds.append(1)
+        await asyncio.sleep(0.05)
+        return b"plan"
+
+    async def scenario():
+        return await asyncio.gather(*(plans.get_or_build("key", build) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert len(builds) == 1
+    assert sorted(status for _, status in results) == ["coalesced"] * 4 + ["miss"]
+    assert all(body == b"plan" for body, _ in results)
+
+
+def test_lease_makes_other_workers_wait(server, monkeypatch):
+    first = PlanCache(redis_cache(server, monkeypatch))
+    second = PlanCache(redis_cache(server, monkeypatch))
+    builds = []
+
+    def builder(name):
+        async def build():
+            builds.append(name)
+            await asyncio.sleep(0.1)
+            return b"plan"
+        return build
+
+    async def scenario():
+        leader = asyncio.create_task(first.get_or_build("key", builder("first")))
+        await asyncio.sleep(0.02)  # the first worker holds the lease
+        follower = await second.get_or_build("key", builder("second"))
+        return await leader, follower
+
+    leader, follower = asyncio.run(scenario())
+    assert builds == ["first"]
+    assert leader == (b"plan", "miss")
+    assert follower == (b"plan", "coalesced")
+
+
+def test_released_lease_without_result_builds_locally(server, monkeypatch):
+    first = PlanCache(redis_cache(server, monkeypatch))
+    second = PlanCache(redis_cache(server, monkeypatch))
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("planner failed")
+
+    async def build():
+        return b"plan"
+
+    async def scenario():
+        leader = asyncio.create_task(first.get_or_build("key", failing))
+        await asyncio.sleep(0.02)
+        follower = await second.get_or_build("key", build)
+        with pytest.raises(RuntimeError):
+            await leader
+        return follower, await second.backend.get(second.prefix + "key:lease")
+
+    follower, lease = asyncio.run(scenario())
+    assert follower == (b"plan", "miss")
+    assert lease is None
+
+
+def test_category_cache_on_local_backend():
+    classifier = type("Classifier", (), {"version": "v1", "classify": lambda self, text: "work"})()
+    cache = CategoryCache(maxsize=2)
+
+    assert cache.classify("report", None, classifier) == "work"
+    assert cache.classify("report", None, classifier) == "work"
+    cache.classify("email", None, classifier)
+    cache.classify("gym", None, classifier)
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 3}
+    assert cache.make_key("report", None, "v1").startswith(f"{cache_backend.CACHE_NAMESPACE}:category:")
+
+    cache.clear()
+    assert cache.stats() == {"size": 0, "maxsize": 2, "hits": 0, "misses": 0}
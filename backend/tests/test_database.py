@@ -0,0 +1,120 @@
+"""/tasks and /session against a fresh in-memory SQLite database (no schema step beforehand)."""
+import pytest
+
+from conftest import auth_header
+
+ALICE = auth_header("alice")
+BOB = auth_header("bob")
+
+
+def test_requires_authentication(db_client):
+    assert db_client.get("/tasks").status_code == 401
+    assert db_client.get("/tasks", headers={"Authorization": "Bearer nope"}).status_code == 401
+
+
+def test_tasks_are_created_and_listed_per_user(db_client):
+    for i in range(5):
+        r = db_client.post("/tasks", json={"title": f"task {i}", "completed": i % 2 == 1}, headers=ALICE)
+        assert r.status_code == 201
+        assert r.json()["title"] == f"task {i}"
+    db_client.post("/tasks", json={"title": "bob's"}, headers=BOB)
+
+    page = db_client.get("/tasks", headers=ALICE).json()
+    assert [t["title"] for t in page["items"]] == [f"task {i}" for i in range(5)]
+    assert page["nextCursor"] is None
+    assert [t["title"] for t in db_client.get("/tasks", headers=BOB).json()["items"]] == ["bob's"]
+
+
+def test_tasks_keyset_pages_filter_and_projection(db_client):
+    for i in range(7):
+        db_client.post("/tasks", json={"title": f"task {i}", "completed": i % 3 == 0}, headers=ALICE)
+
+    titles, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = db_client.get("/tasks", params=params, headers=ALICE).json()
+        assert len(page["items"]) <= 3
+        titles += [t["title"] for t in page["items"]]
+        cursor = page["nextCursor"]
+        if cursor is None:
+            break
+    assert titles == [f"task {i}" for i in range(7)]
+
+    done = db_client.get("/tasks", params={"completed": True}, headers=ALICE).json()["items"]
+    assert [t["title"] for t in done] == ["task 0", "task 3", "task 6"]
+
+    projected = db_client.get("/tasks", params={"fields": "title"}, headers=ALICE).json()["items"]
+    assert set(projected[0]) == {"id", "title"}
+    ids = db_client.get("/tasks", params={"fields": "id"}, headers=ALICE).json()["items"]
+    assert len(ids) == 7 and all(set(t) == {"id"} for t in ids)
+    assert db_client.get("/tasks", params={"fields": "secret"}, headers=ALICE).status_code == 422
+    assert db_client.get("/tasks", params={"cursor": "x"}, headers=ALICE).status_code == 422
+
+
+@pytest.mark.parametrize("fields", ["id", "title", "completed,title"])
+def test_tasks_keyset_pages_with_projection(db_client, fields):
+    for i in range(5):
+        db_client.post("/tasks", json={"title": f"task {i}"}, headers=ALICE)
+
+    items, cursor = [], None
+    while True:
+        params = {"limit": 2, "fields": fields, **({"cursor": cursor} if cursor else {})}
+        response = db_client.get("/tasks", params=params, headers=ALICE)
+        assert response.status_code == 200
+        page = response.json()
+        items += page["items"]
+        cursor = page["nextCursor"]
+        if cursor is None:
+            break
+    assert len(items) == 5
+    assert [t["id"] for t in items] == sorted(t["id"] for t in items)
+    assert all(set(t) == {"id", *fields.split(",")} for t in items)
+
+
+def test_session_lifecycle(db_client):
+    assert db_client.get("/session", headers=ALICE).status_code == 404
+
+    first = db_client.post("/session", headers=ALICE).json()
+    assert first["status"] == "active"
+    assert db_client.get("/session", headers=ALICE).json()["id"] == first["id"]
+
+    # starting another session ends the open one
+    second = db_client.post("/session", headers=ALICE).json()
+    assert second["id"] != first["id"]
+    assert db_client.get("/session", headers=ALICE).json()["id"] == second["id"]
+
+    ended = db_client.post("/session/end", headers=ALICE).json()
+    assert ended["status"] == "ended" and ended["end_time"] is not None
+    assert db_client.get("/session", headers=ALICE).status_code == 404
+    assert db_client.post("/session/end", headers=ALICE).status_code == 404
+    assert db_client.get("/session", headers=BOB).status_code == 404
+
+
+def test_bulk_writes_are_idempotent(db_client):
+    ops = [
+        {"op": "create", "client_id": "a", "title": "write report"},
+        {"op": "create", "client_id": "b", "title": "gym"},
+    ]
+    first = db_client.post("/tasks/bulk", json={"ops": ops}, headers=ALICE).json()["results"]
+    assert [r["status"] for r in first] == ["created", "created"]
+    # a replay after a lost response updates the same rows
+    again = db_client.post("/tasks/bulk", json={"ops": ops}, headers=ALICE).json()["results"]
+    assert [r["status"] for r in again] == ["updated", "updated"]
+    assert [r["id"] for r in again] == [r["id"] for r in first]
+
+    ops = [
+        {"op": "update", "client_id": "a", "title": "write report", "completed": True},
+        {"op": "delete", "client_id": "b"},
+        {"op": "delete", "client_id": "missing"},
+    ]
+    results = db_client.post("/tasks/bulk", json={"ops": ops}, headers=ALICE).json()["results"]
+    assert [r["status"] for r in results] == ["updated", "deleted", "not_found"]
+
+    items = db_client.get("/tasks", headers=ALICE).json()["items"]
+    assert [(t["client_id"], t["completed"]) for t in items] == [("a", True)]
+    # client ids are scoped per user
+    bob = db_client.post("/tasks/bulk", json={"ops": ops[:1]}, headers=BOB).json()["results"]
+    assert bob[0]["status"] == "created"
+
+    duplicate = [{"op": "delete", "client_id": "a"}, {"op": "delete", "client_id": "a"}]
+    assert db_client.post("/tasks/bulk", json={"ops": duplicate}, headers=ALICE).status_code == 422
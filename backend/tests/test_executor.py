@@ -0,0 +1,119 @@
+"""Plan routes on the plan executor: request profiles and admission control."""
+import random
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import services.executor as executor
+import services.workers as workers
+from api.routes import plan
+from api.routes.plan import build_plan, plan_skeleton
+from core.metrics import MetricsMiddleware
+from models.plan import PlanGenerateRequest, Task
+from services.executor import plan_executor
+
+SIZE = 60  # above PLAN_SMALL_MAX_TASKS, so nothing runs on the small inline path
+
+
+def tasks_payload(seed: int) -> list:
+    rnd = random.Random(seed)
+    return [
+        Task(id=f"t{i}", name=rnd.choice(["email inbox", "write report", "gym run", "read paper"]),
+             priority=rnd.randint(1, 3), difficulty=rnd.randint(1, 3),
+             durationMinutes=rnd.choice([5, 10, 20, 45, 90]), status=0).model_dump()
+        for i in range(SIZE)
+    ]
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(plan.router)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("mode", ["thread", "process"])
+def test_profile_header_includes_planner_phases(client, monkeypatch, mode):
+    monkeypatch.setattr(plan_executor, "mode", mode)
+    if mode == "process":
+        monkeypatch.setattr(workers, "PLAN_WORKERS", 2)
+    try:
+        # a fresh seed per mode: a cache hit would skip planning
+        body = {"tasks": tasks_payload({"thread": 11, "process": 12}[mode])}
+        response = client.post("/plan/generate", json=body, headers={"X-Plan-Profile": "1"})
+    finally:
+        workers.shutdown_process_pool()
+    assert response.status_code == 200
+    phases = {item.split(";")[0].strip() for item in response.headers["server-timing"].split(",")}
+    assert {"sorting", "grouping", "scheduling", "serialization", "total"} <= phases
+
+
+def test_small_plans_report_planner_phases(client):
+    # the small-input path runs inline, without the general path's preparation
+    body = {"tasks": tasks_payload(13)[:4]}
+    response = client.post("/plan/generate", json=body, headers={"X-Plan-Profile": "1"})
+    assert response.status_code == 200
+    phases = {item.split(";")[0].strip() for item in response.headers["server-timing"].split(",")}
+    assert {"filtering", "sorting", "grouping", "scheduling", "serialization"} <= phases
+
+
+def test_streaming_and_patch_routes_are_admitted(client, monkeypatch):
+    monkeypatch.setattr(plan_executor, "max_concurrent", 1)
+    monkeypatch.setattr(plan_executor, "max_queue", 0)
+    tasks = tasks_payload(1)
+    plan_body = build_plan(PlanGenerateRequest(tasks=tasks)).model_dump()
+    requests = [
+        ("/plan/generate/stream", {"tasks": tasks}),
+        ("/plan/generate/batch", {"items": [{"tasks": tasks[:3]}, {"tasks": tasks}]}),
+        ("/plan/patch", {"tasks": tasks, "plan": plan_body, "changes": [{"op": "delete", "taskId": "t3"}]}),
+    ]
+
+    # hold the only slot: with no queue every planning request is refused
+    assert client.portal.call(plan_executor.acquire)
+    try:
+        for path, body in requests:
+            response = client.post(path, json=body)
+            assert response.status_code == 503, path
+            assert response.headers["retry-after"] == str(plan_executor.retry_after)
+    finally:
+        client.portal.call(plan_executor.release)
+
+    for path, body in requests:
+        response = client.post(path, json=body)
+        assert response.status_code == 200, path
+        # streamed responses give their slot back once the body is sent
+        assert plan_executor.running == 0
+    assert b'"event":"end"' in client.post("/plan/generate/stream", json={"tasks": tasks}).content
+
+
+def test_long_single_tasks_are_not_small(client, monkeypatch):
+    monkeypatch.setattr(plan_executor, "max_concurrent", 1)
+    monkeypatch.setattr(plan_executor, "max_queue", 0)
+    short = {"tasks": [{"id": "a", "name": "write report", "priority": 1, "difficulty": 1, "durationMinutes": 90,
+                        "status": 0}]}
+    # one task, but a thousand blocks of work: it must not plan on the event loop
+    long = {"tasks": [{**short["tasks"][0], "durationMinutes": 30_000}]}
+
+    assert client.portal.call(plan_executor.acquire)
+    try:
+        assert client.post("/plan/generate", json=short).status_code == 200
+        response = client.post("/plan/generate", json=long)
+        assert response.status_code == 503
+    finally:
+        client.portal.call(plan_executor.release)
+    assert client.post("/plan/generate", json=long).status_code == 200
+
+
+def test_skeleton_memo_only_holds_short_shapes(monkeypatch):
+    # small by count and blocks, but longer than a memoized skeleton
+    request = PlanGenerateRequest(tasks=[Task(id="a", name="write report", priority=1, difficulty=1,
+                                              durationMinutes=1500, status=0)])
+    cached = plan_skeleton.cache_info().currsize
+    small = build_plan(request).model_dump()
+    assert plan_skeleton.cache_info().currsize == cached
+
+    monkeypatch.setattr(executor, "SMALL_PLAN_MAX_TASKS", 0)
+    assert small == build_plan(request).model_dump()
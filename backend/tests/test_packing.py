@@ -0,0 +1,23 @@
+"""packing="optimal": the search budget counts nodes, so results never depend on timing."""
+import time
+
+from services.packing import pack_durations
+
+# best-fit needs 10 blocks here; finding the 9-block packing takes a real search
+DURATIONS = [2, 3, 6, 6, 6, 10, 2, 8, 5, 8, 8, 6, 7, 2, 10, 1, 3, 1, 9, 8, 10, 5, 4, 10, 6, 6]
+CAPACITY = 17
+
+
+def test_search_budget_is_deterministic(monkeypatch):
+    full = pack_durations(DURATIONS, CAPACITY, budget=100_000)
+    assert full is not None and len(full) == 9
+    assert sorted(i for b in full for i in b) == list(range(len(DURATIONS)))
+    assert all(sum(DURATIONS[i] for i in b) <= CAPACITY for b in full)
+    # cut short, the search gives up the same way every time
+    assert pack_durations(DURATIONS, CAPACITY, budget=50) is None
+
+    # a machine so slow every clock read takes a second still gets the same packings
+    clock = iter(range(10**6))
+    monkeypatch.setattr(time, "perf_counter", lambda: float(next(clock)))
+    assert pack_durations(DURATIONS, CAPACITY, budget=100_000) == full
+    assert pack_durations(DURATIONS, CAPACITY, budget=50) is None
@@ -0,0 +1,55 @@
+"""
+Peak memory of one large generate request, as traced by tracemalloc. The "before" is
+the frozen reference planner (tests/reference_plan.py), which builds PlanBlock models
+throughout and renders them with Pydantic.
+"""
+import random
+import tracemalloc
+
+import reference_plan
+from api.routes.plan import build_plan
+from models.plan import PlanGenerateRequest, PlanGenerateResponse, Task
+from services.plan_json import render_plan
+
+SIZE = 10000
+
+
+def large_request() -> PlanGenerateRequest:
+    rnd = random.Random(22)
+    return PlanGenerateRequest(tasks=[
+        Task(id=f"t{i}", name=f"task {i}", priority=rnd.randint(1, 3), difficulty=rnd.randint(1, 3),
+             durationMinutes=rnd.choice([5, 10, 20, 45, 90, 150]), status=rnd.choice([0, 0, 0, 1, 2]))
+        for i in range(SIZE)
+    ])
+
+
+def peak_memory(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_plain_blocks_are_dicts_until_rendered():
+    plan = build_plan(large_request(), plain=True)
+    assert all(type(b) is dict for b in plan["blocks"])
+    assert all(type(si) is dict for b in plan["blocks"] for si in b["splitInfos"] or ())
+
+
+def test_peak_memory_against_the_reference_planner():
+    request = large_request()
+    render = lambda plan: plan.model_dump_json()  # noqa: E731
+    # warm caches outside the trace
+    render(reference_plan.generate_plan(request))
+    render_plan(build_plan(request, plain=True), PlanGenerateResponse)
+
+    before = peak_memory(lambda: render(reference_plan.generate_plan(request)))
+    models = peak_memory(lambda: render_plan(build_plan(request), PlanGenerateResponse))
+    fast = peak_memory(lambda: render_plan(build_plan(request, plain=True), PlanGenerateResponse))
+    # models mode (the default) keeps the whole PlanBlock tree alive until rendered, as
+    # before: the slotted scheduler records don't move its peak, it just mustn't regress
+    assert models < 1.05 * before, (models, before)
+    # the fast path's saving (about 0.35x here) comes from plain dicts and chunked validation
+    assert fast < 0.6 * before, (fast, before)
@@ -0,0 +1,189 @@
+"""/plan/patch against the scheduler: patched suffixes must match what generate would have planned."""
+import random
+from collections import defaultdict
+
+import pytest
+
+from api.routes.plan import build_patched_plan, build_plan
+from models.plan import PlanGenerateRequest, PlanPatchRequest, Task, TaskChange
+from services.profiles import BUILTIN_PROFILES
+
+WORDS = ["email inbox", "write report", "gym run", "code review", "call mom", "read paper", "pay bill"]
+DURATIONS = [3, 5, 10, 15, 20, 45, 60, 90, 130]
+SEEDS = range(8)
+
+
+def random_tasks(seed: int) -> list:
+    rnd = random.Random(seed)
+    return [
+        Task(id=f"t{i}", name=rnd.choice(WORDS), priority=rnd.randint(1, 3), difficulty=rnd.randint(1, 3),
+             durationMinutes=rnd.choice(DURATIONS), status=rnd.choice([0, 0, 0, 1]))
+        for i in range(rnd.randint(6, 25))
+    ]
+
+
+def patch(tasks, plan, profile, changes, current_block_id=None):
+    request = PlanPatchRequest(tasks=tasks, plan=plan, changes=changes, currentBlockId=current_block_id)
+    return build_patched_plan(request, profile)
+
+
+def plan_only(response) -> dict:
+    data = response.model_dump()
+    data.pop("rescheduledFromBlockId")
+    return data
+
+
+def first_blocks(plan) -> dict:
+    """taskId -> index of the first block it appears in, in plan order."""
+    first = {}
+    for i, block in enumerate(plan.blocks):
+        for tid in block.tasks:
+            first.setdefault(tid, i)
+    return first
+
+
+def scheduled_minutes(plan, block_length: int, tasks_by_id: dict) -> dict:
+    minutes = defaultdict(int)
+    for block in plan.blocks:
+        splits = {si.originalTaskId: si for si in block.splitInfos or ()}
+        for tid in block.tasks:
+            si = splits.get(tid)
+            if si is None or si.totalParts == 1:
+                minutes[tid] += tasks_by_id[tid].durationMinutes
+            elif si.part < si.totalParts:
+                minutes[tid] += block_length
+            else:
+                minutes[tid] += tasks_by_id[tid].durationMinutes - (si.totalParts - 1) * block_length
+    return dict(minutes)
+
+
+def assert_consistent(patched, original, tasks_by_id: dict, profile):
+    """Prefix untouched, ids contiguous, every open task fully scheduled, and a no-op patch of the result is stable."""
+    start = patched.rescheduledFromBlockId
+    assert start is not None
+    prefix = original.blocks[:start - 1]
+    if len(patched.blocks) < len(prefix):
+        # nothing was left to schedule: the prefix's trailing break goes, as in generate
+        assert prefix[-1].type == "break"
+        prefix = prefix[:-1]
+    assert [b.model_dump() for b in patched.blocks[:len(prefix)]] == [b.model_dump() for b in prefix]
+    assert [b.blockId for b in patched.blocks] == list(range(1, len(patched.blocks) + 1))
+    assert patched.blocks[-1].type == "work"
+    open_tasks = {tid: t for tid, t in tasks_by_id.items() if t.status not in (2, 3)}
+    assert scheduled_minutes(patched, profile.blockLength, tasks_by_id) == {
+        tid: t.durationMinutes for tid, t in open_tasks.items()
+    }
+    # the break accounting replayed from the result's own prefix reproduces it
+    again = patch(list(tasks_by_id.values()), patched, profile,
+                  [TaskChange(op="update", task=tasks_by_id[patched.blocks[-1].tasks[0]])])
+    assert plan_only(again) == plan_only(patched)
+
+
+@pytest.mark.parametrize("profile_name", BUILTIN_PROFILES)
+def test_noop_patch_reproduces_the_generated_plan(profile_name):
+    profile = BUILTIN_PROFILES[profile_name]
+    for seed in SEEDS:
+        tasks = random_tasks(seed)
+        plan = build_plan(PlanGenerateRequest(tasks=tasks), profile=profile)
+        by_id = {t.id: t for t in tasks}
+        assert plan_only(patch(tasks, plan, profile, [])) == plan.model_dump()
+        # rescheduling from every task's first block, and from every current block
+        # (breaks included), must give back exactly the generated plan
+        for tid in first_blocks(plan):
+            for current in [None] + [b.blockId for b in plan.blocks]:
+                patched = patch(tasks, plan, profile, [TaskChange(op="update", task=by_id[tid])], current)
+                assert plan_only(patched) == plan.model_dump(), (seed, tid, current)
+
+
+@pytest.mark.parametrize("profile_name", BUILTIN_PROFILES)
+def test_delete_reschedules_the_rest(profile_name):
+    profile = BUILTIN_PROFILES[profile_name]
+    for seed in SEEDS:
+        tasks = random_tasks(seed)
+        plan = build_plan(PlanGenerateRequest(tasks=tasks), profile=profile)
+        first = first_blocks(plan)
+        anchor = next(i for i, b in enumerate(plan.blocks) if b.splitInfos)
+        for tid in [t for t, i in first.items() if i > anchor]:
+            patched = patch(tasks, plan, profile, [TaskChange(op="delete", taskId=tid)])
+            remaining = {t.id: t for t in tasks if t.id != tid}
+            assert all(tid not in b.tasks for b in patched.blocks)
+            assert patched.rescheduledFromBlockId == plan.blocks[first[tid]].blockId
+            assert_consistent(patched, plan, remaining, profile)
+            # the remaining work keeps its previous order
+            order = [t for t in first_blocks(plan) if t != tid]
+            assert list(first_blocks(patched)) == order
+
+
+@pytest.mark.parametrize("profile_name", BUILTIN_PROFILES)
+def test_added_tasks_go_after_the_remaining_work(profile_name):
+    profile = BUILTIN_PROFILES[profile_name]
+    for seed in SEEDS:
+        tasks = random_tasks(seed)
+        plan = build_plan(PlanGenerateRequest(tasks=tasks), profile=profile)
+        added = [
+            Task(id="new-long", name="write report", priority=1, difficulty=2, durationMinutes=75, status=0),
+            Task(id="new-quick", name="call mom", priority=3, difficulty=1, durationMinutes=4, status=0),
+        ]
+        patched = patch(tasks, plan, profile, [TaskChange(op="add", task=t) for t in added])
+        by_id = {t.id: t for t in tasks + added}
+        assert patched.rescheduledFromBlockId == plan.blocks[-1].blockId
+        assert_consistent(patched, plan, by_id, profile)
+        order = list(first_blocks(patched))
+        assert order[:-2] == list(first_blocks(plan))
+        assert set(order[-2:]) == {"new-long", "new-quick"}
+
+
+@pytest.mark.parametrize("profile_name", BUILTIN_PROFILES)
+def test_reprioritizing(profile_name):
+    profile = BUILTIN_PROFILES[profile_name]
+    for seed in SEEDS:
+        tasks = random_tasks(seed)
+        plan = build_plan(PlanGenerateRequest(tasks=tasks), profile=profile)
+        first = first_blocks(plan)
+        anchor = next(i for i, b in enumerate(plan.blocks) if b.splitInfos)
+        anchor_id = plan.blocks[anchor].splitInfos[0].originalTaskId
+        by_id = {t.id: t for t in tasks}
+
+        # a change that reaches the opening blocks reorders the whole plan, exactly as generate would
+        demoted = by_id[anchor_id].model_copy(update={"priority": 3, "difficulty": 3})
+        reordered = [demoted if t.id == anchor_id else t for t in tasks]
+        patched = patch(tasks, plan, profile, [TaskChange(op="update", task=demoted)])
+        assert plan_only(patched) == build_plan(PlanGenerateRequest(tasks=reordered), profile=profile).model_dump()
+        assert patched.rescheduledFromBlockId == 1
+
+        # later in the plan the remaining work keeps its previous order
+        later = [t for t, i in first.items() if i > anchor]
+        if later:
+            promoted = by_id[later[-1]].model_copy(update={"priority": 1})
+            patched = patch(tasks, plan, profile, [TaskChange(op="update", task=promoted)])
+            assert list(first_blocks(patched)) == list(first)
+            assert_consistent(patched, plan, {**by_id, promoted.id: promoted}, profile)
+
+
+@pytest.mark.parametrize("profile_name", BUILTIN_PROFILES)
+def test_current_block_past_the_first_break(profile_name):
+    profile = BUILTIN_PROFILES[profile_name]
+    for seed in SEEDS:
+        tasks = random_tasks(seed)
+        plan = build_plan(PlanGenerateRequest(tasks=tasks), profile=profile)
+        first_break = next((i for i, b in enumerate(plan.blocks) if b.type == "break"), None)
+        if first_break is None or first_break + 2 >= len(plan.blocks):
+            continue
+        by_id = {t.id: t for t in tasks}
+        for current in plan.blocks[first_break:]:
+            # a task already worked on before the current block is completed
+            done = plan.blocks[first_break - 1].tasks[0]
+            patched = patch(tasks, plan, profile, [TaskChange(op="complete", taskId=done)], current.blockId)
+            # blocks before the current one are done and never rescheduled
+            kept = next(i for i, b in enumerate(plan.blocks) if b.blockId >= current.blockId)
+            while plan.blocks[kept].type == "break":
+                kept += 1
+            assert [b.model_dump() for b in patched.blocks[:kept]] == [b.model_dump() for b in plan.blocks[:kept]]
+            later = [b for b in patched.blocks[kept:] if done in b.tasks]
+            assert not later, (seed, current.blockId)
+            assert patched.blocks[-1].type == "work"
+            assert [b.blockId for b in patched.blocks] == list(range(1, len(patched.blocks) + 1))
+            minutes = scheduled_minutes(patched, profile.blockLength, by_id)
+            for tid, t in by_id.items():
+                if t.status not in (2, 3) and tid != done:
+                    assert minutes[tid] == t.durationMinutes
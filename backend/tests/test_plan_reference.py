@@ -0,0 +1,64 @@
+"""Block-for-block comparison of the planner with the frozen reference implementation."""
+import random
+
+import pytest
+
+import reference_plan
+from api.routes.plan import build_plan, build_regenerated_plan
+from models.plan import PlanGenerateRequest, PlanRegenerateRequest, Task
+
+SIZES = [0, 1, 2, 3, 5, 10, 50, 200, 1000, 10000]
+DURATIONS = [1, 5, 10, 11, 15, 20, 25, 30, 31, 45, 60, 90, 125]
+
+
+def random_tasks(n: int, rnd: random.Random, words) -> list:
+    return [
+        Task(
+            # a few duplicate ids, as clients sometimes send
+            id=f"t{rnd.randint(0, n)}" if rnd.random() < 0.05 else f"t{i}",
+            name=" ".join(rnd.choice(words) for _ in range(rnd.randint(1, 3))),
+            description=None if rnd.random() < 0.5 else rnd.choice(words),
+            priority=rnd.randint(1, 3),
+            difficulty=rnd.randint(1, 3),
+            durationMinutes=rnd.choice(DURATIONS),
+            status=rnd.choice([0, 0, 0, 1, 2, 3]),
+        )
+        for i in range(n)
+    ]
+
+
+def dump(plan) -> dict:
+    data = plan.model_dump()
+    # added after the reference was frozen
+    data.pop("utilization", None)
+    return data
+
+
+@pytest.fixture
+def words(single_word_categories, monkeypatch):
+    monkeypatch.setattr(reference_plan, "load_categories", lambda: single_word_categories)
+    return [k for keywords in single_word_categories.values() for k in keywords] + ["foo", "bar", "baz"]
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_generate_matches_reference(size, words):
+    rnd = random.Random(size)
+    for _ in range(20 if size <= 1000 else 2):
+        tasks = random_tasks(size, rnd, words)
+        preserve_order = rnd.random() < 0.3
+        expected = reference_plan.generate_plan(PlanGenerateRequest(tasks=tasks), preserve_order=preserve_order)
+        actual = build_plan(PlanGenerateRequest(tasks=tasks), preserve_order=preserve_order)
+        assert dump(actual) == dump(expected)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_regenerate_matches_reference(size, words):
+    rnd = random.Random(1000 + size)
+    for _ in range(20 if size <= 1000 else 2):
+        payload = PlanRegenerateRequest(
+            tasks=random_tasks(size, rnd, words),
+            seed=rnd.randint(1, 999999),
+            randomness=rnd.random(),
+            allowDifferentQuickTask=rnd.random() < 0.5,
+        )
+        assert dump(build_regenerated_plan(payload)) == dump(reference_plan.regenerate_plan(payload))
@@ -0,0 +1,37 @@
+"""Seeded /plan/regenerate output must not depend on other requests running concurrently."""
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from api.routes.plan import build_regenerated_plan
+from models.plan import PlanRegenerateRequest, Task
+
+SEEDS = 40
+REPEATS = 4
+THREADS = 16
+
+
+def make_tasks(n: int, rnd: random.Random) -> list:
+    names = ["email inbox", "write report", "gym run", "code review", "call mom", "read paper"]
+    return [
+        Task(id=f"t{i}", name=rnd.choice(names), priority=rnd.randint(1, 3), difficulty=rnd.randint(1, 3),
+             durationMinutes=rnd.choice([3, 5, 10, 20, 45, 90, 130]), status=rnd.choice([0, 0, 1, 2]))
+        for i in range(n)
+    ]
+
+
+def test_concurrent_regenerate_matches_sequential():
+    tasks = make_tasks(300, random.Random(6))
+    payloads = [
+        PlanRegenerateRequest(tasks=tasks, seed=seed, randomness=0.4, allowDifferentQuickTask=True)
+        for seed in range(1, SEEDS + 1)
+    ]
+    expected = [build_regenerated_plan(p).model_dump() for p in payloads]
+
+    jobs = payloads * REPEATS
+    random.Random(0).shuffle(jobs)
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = list(pool.map(lambda p: (p.seed, build_regenerated_plan(p).model_dump()), jobs))
+
+    assert len(results) == SEEDS * REPEATS
+    for seed, plan in results:
+        assert plan == expected[seed - 1]
@@ -0,0 +1,80 @@
+"""Databases created by earlier releases are upgraded in place at startup."""
+import sqlite3
+
+import pytest
+
+from api.routes.plan import build_plan
+from conftest import auth_header
+from core.auth import AuthUser
+from models.plan import PlanGenerateRequest, Task
+from services.plan_store import save_plan
+
+ALICE = auth_header("alice")
+
+# the tables as the first release created them
+OLD_SCHEMA = """
+CREATE TABLE user (id VARCHAR NOT NULL PRIMARY KEY, email VARCHAR NOT NULL);
+CREATE TABLE task (id INTEGER NOT NULL PRIMARY KEY, user_id VARCHAR REFERENCES user (id),
+                   title VARCHAR NOT NULL, completed BOOLEAN NOT NULL);
+CREATE TABLE plan (id INTEGER NOT NULL PRIMARY KEY, user_id VARCHAR REFERENCES user (id),
+                   created_at DATETIME NOT NULL, data VARCHAR NOT NULL);
+INSERT INTO user VALUES ('alice', 'alice@example.com');
+INSERT INTO task (user_id, title, completed) VALUES ('alice', 'old task', 0);
+INSERT INTO plan (user_id, created_at, data) VALUES ('alice', '2025-01-01 00:00:00', '{}');
+"""
+
+
+def schema(database_url: str):
+    """{table: ({column: (type, notnull)}, {index: unique})} as SQLite sees it."""
+    with sqlite3.connect(database_url[len("sqlite:///"):]) as conn:
+        return {
+            table: (
+                {row[1]: (row[2], row[3]) for row in conn.execute(f"PRAGMA table_info({table})")},
+                {row[1]: row[2] for row in conn.execute(f"PRAGMA index_list({table})")},
+            )
+            for table in ("task", "plan")
+        }
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(OLD_SCHEMA)
+    return f"sqlite:///{path}"
+
+
+def test_old_database_gets_client_id_and_indexes(db_client, database_url):
+    assert [t["title"] for t in db_client.get("/tasks", headers=ALICE).json()["items"]] == ["old task"]
+
+    ops = [{"op": "create", "client_id": "c1", "title": "new task"}]
+    assert db_client.post("/tasks/bulk", json={"ops": ops}, headers=ALICE).json()["results"][0]["status"] == "created"
+    assert db_client.post("/tasks/bulk", json={"ops": ops}, headers=ALICE).json()["results"][0]["status"] == "updated"
+
+    columns, indexes = schema(database_url)["task"]
+    assert "client_id" in columns
+    assert indexes["ux_task_user_id_client_id"] == 1
+    assert {"ix_task_user_id_id", "ix_task_user_id_completed_id"} <= set(indexes)
+
+
+def test_old_database_stores_and_reads_encoded_plans(db_client, database_url):
+    # the legacy JSON row has no blob and is not listed
+    assert db_client.get("/plans/latest", headers=ALICE).status_code == 404
+
+    columns, indexes = schema(database_url)["plan"]
+    assert columns["kind"] == ("VARCHAR", 1)
+    assert {"blob", "seed", "task_hash"} <= set(columns)
+    assert {"ix_plan_user_id_created_at", "ix_plan_user_id_task_hash"} <= set(indexes)
+
+    plan = build_plan(PlanGenerateRequest(tasks=[
+        Task(id="t1", name="write report", priority=3, difficulty=2, durationMinutes=50, status=0),
+        Task(id="t2", name="reply email", priority=1, difficulty=1, durationMinutes=5, status=0),
+    ]))
+    body = plan.model_dump_json().encode()
+    db_client.portal.call(save_plan, AuthUser(id="alice", email="alice@example.com"), body, "generate", "h1")
+
+    latest = db_client.get("/plans/latest", headers=ALICE).json()
+    assert latest["kind"] == "generate"
+    assert latest["totalBlocks"] == plan.totalBlocks
+    saved = db_client.get(f"/plans/{latest['id']}", headers=ALICE).json()
+    assert len(saved["blocks"]) == len(plan.blocks)
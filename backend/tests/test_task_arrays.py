@@ -0,0 +1,107 @@
+"""The NumPy path must order tasks exactly like the pure-Python helpers, ties included."""
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import services.task_arrays as task_arrays  # noqa: E402
+from api.routes.plan import build_plan, build_regenerated_plan, compute_score, is_quick_task, sort_tasks  # noqa: E402
+from models.plan import PlanGenerateRequest, PlanRegenerateRequest, Task  # noqa: E402
+from services.task_arrays import noisy_order, pack, partition_sorted  # noqa: E402
+
+SIZES = [1, 2, 3, 8, 40, 300]
+QUICK_MINUTES = [0, 10, 30]
+
+
+@pytest.fixture(autouse=True)
+def vectorize_everything(monkeypatch):
+    monkeypatch.setattr(task_arrays, "VECTORIZE_MIN_TASKS", 1)
+    # also does the lazy NumPy import that pack() relies on
+    assert task_arrays.should_vectorize(tied_tasks(1, random.Random(0)))
+
+
+def tied_tasks(n: int, rnd: random.Random) -> list:
+    """Few distinct (score, duration) pairs, so most comparisons are ties."""
+    return [
+        Task(id=f"t{i}", name=f"task {i}", priority=rnd.randint(1, 2), difficulty=rnd.choice([1, 3]),
+             durationMinutes=rnd.choice([5, 10, 30, 60]), status=rnd.choice([0, 0, 1, 2, 3]))
+        for i in range(n)
+    ]
+
+
+def ids(tasks) -> list:
+    return [t.id for t in tasks]
+
+
+def python_partition(tasks, quick_minutes: int, preserve_order: bool):
+    """prepare_tasks' pure-Python filtering and sorting."""
+    active = [t for t in tasks if t.status not in (2, 3)]
+    quick = [t for t in active if is_quick_task(t, quick_minutes)]
+    normal = [t for t in active if not is_quick_task(t, quick_minutes)]
+    motivation = None
+    if quick:
+        motivation = sort_tasks(quick)[0]
+        del quick[quick.index(motivation)]
+    if not preserve_order:
+        normal = sort_tasks(normal)
+        quick = sort_tasks(quick)
+    return motivation, quick, normal
+
+
+@pytest.mark.parametrize("preserve_order", [False, True])
+@pytest.mark.parametrize("size", SIZES)
+def test_partition_sorted_matches_python(size, preserve_order):
+    rnd = random.Random(size)
+    for _ in range(20):
+        tasks = tied_tasks(size, rnd)
+        for quick_minutes in QUICK_MINUTES:
+            motivation, quick, normal = partition_sorted(pack(tasks), quick_minutes, preserve_order)
+            expected_motivation, expected_quick, expected_normal = python_partition(tasks, quick_minutes, preserve_order)
+            assert motivation is expected_motivation
+            assert ids(quick) == ids(expected_quick)
+            assert ids(normal) == ids(expected_normal)
+
+
+def test_partition_sorted_keeps_input_order_on_full_ties():
+    tasks = [Task(id=f"t{i}", name="same", priority=2, difficulty=2, durationMinutes=d, status=0)
+             for i, d in enumerate([5, 60, 5, 60, 5, 60])]
+    motivation, quick, normal = partition_sorted(pack(tasks), 10, False)
+    assert motivation.id == "t0"
+    assert ids(quick) == ["t2", "t4"]
+    assert ids(normal) == ["t1", "t3", "t5"]
+
+
+@pytest.mark.parametrize("randomness", [0.0, 0.1, 0.5, 1.0])
+@pytest.mark.parametrize("size", SIZES)
+def test_noisy_order_matches_noisy_score_sort(size, randomness):
+    tasks = tied_tasks(size, random.Random(size))
+    for seed in range(1, 21):
+        rng = random.Random(seed)
+
+        def noisy_score(task):
+            base = compute_score(task)
+            return base + rng.uniform(-randomness, randomness) * base
+
+        expected = sorted(tasks, key=noisy_score, reverse=True)
+        actual_rng = random.Random(seed)
+        assert ids(noisy_order(pack(tasks), actual_rng, randomness)) == ids(expected)
+        # both paths leave the generator in the same state for the draws that follow
+        assert actual_rng.random() == rng.random()
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_plans_match_with_and_without_numpy(size, monkeypatch):
+    rnd = random.Random(100 + size)
+    cases = []
+    for _ in range(10):
+        tasks = tied_tasks(size, rnd)
+        cases.append((PlanGenerateRequest(tasks=tasks), rnd.random() < 0.5,
+                      PlanRegenerateRequest(tasks=tasks, seed=rnd.randint(1, 999999), randomness=rnd.random(),
+                                            allowDifferentQuickTask=rnd.random() < 0.5)))
+    vectorized = [(build_plan(g, preserve_order=p).model_dump(), build_regenerated_plan(r).model_dump())
+                  for g, p, r in cases]
+    monkeypatch.setattr(task_arrays, "VECTORIZE_MIN_TASKS", 0)
+    python = [(build_plan(g, preserve_order=p).model_dump(), build_regenerated_plan(r).model_dump())
+              for g, p, r in cases]
+    assert vectorized == python
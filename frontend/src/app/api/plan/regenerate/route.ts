@@ -1,15 +1,30 @@
 export async function POST(req: Request) {
   const body = await req.json()
+  const ifNoneMatch = req.headers.get("if-none-match")
+  // signed-in users' plans are saved by the backend, which needs their access token
+  const authorization = req.headers.get("authorization")
 
   const backendUrl = process.env.NEXT_PUBLIC_BACKEND_URL
 
   const response = await fetch(`${backendUrl}/plan/regenerate`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: {
+      "Content-Type": "application/json",
+      ...(ifNoneMatch ? { "If-None-Match": ifNoneMatch } : {}),
+      ...(authorization ? { Authorization: authorization } : {}),
+    },
     body: JSON.stringify(body),
   })
 
+  // backend plans carry an ETag; pass it through so repeat requests can get a 304
+  const etag = response.headers.get("etag")
+  const headers: HeadersInit = etag ? { ETag: etag } : {}
+
+  if (response.status === 304) {
+    return new Response(null, { status: 304, headers })
+  }
+
   const data = await response.json()
 
-  return new Response(JSON.stringify(data), { status: response.status })
+  return new Response(JSON.stringify(data), { status: response.status, headers })
 }
\ No newline at end of file
@@ -0,0 +1,25 @@
+export async function POST(req: Request) {
+  const body = await req.json()
+  const format = new URL(req.url).searchParams.get("format") === "sse" ? "sse" : "ndjson"
+  const authorization = req.headers.get("authorization")
+
+  const backendUrl = process.env.NEXT_PUBLIC_BACKEND_URL // e.g. https://xyz.ngrok.io
+
+  const response = await fetch(`${backendUrl}/plan/generate/stream?format=${format}`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      ...(authorization ? { Authorization: authorization } : {}),
+    },
+    body: JSON.stringify(body),
+  })
+
+  // relay the stream as-is so blocks reach the client as soon as the backend sends them
+  return new Response(response.body, {
+    status: response.status,
+    headers: {
+      "Content-Type": response.headers.get("content-type") ?? "application/x-ndjson",
+      "Cache-Control": "no-cache",
+    },
+  })
+}
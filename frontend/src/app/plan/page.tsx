@@ -8,6 +8,7 @@ import { RefreshCw, Play } from "lucide-react"
 import { useRouter } from "next/navigation"
 import { useTaskStore } from "../../store/store"
 import { PlanBlock } from "../../components/plan/PlanBlock"
+import { authHeaders } from "../../lib/auth"
 
 export default function PlanPage() {
   const router = useRouter()
@@ -63,7 +64,7 @@ export default function PlanPage() {
     try {
       const res = await fetch("/api/plan/regenerate", {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: { "Content-Type": "application/json", ...(await authHeaders()) },
         body: JSON.stringify({
           tasks: localTasks,
           randomness: 0.35,
@@ -6,6 +6,7 @@ import { Button } from "../ui/button"
 import { Sparkles } from "lucide-react"
 import { useTaskStore } from "../../store/store"
 import { useRouter } from "next/navigation"
+import { authHeaders } from "../../lib/auth"
 
 export function GenerateFooter() {
   const { theme, systemTheme } = useTheme()
@@ -39,7 +40,7 @@ export function GenerateFooter() {
   try {
     const res = await fetch("/api/plan/generate", {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: { "Content-Type": "application/json", ...(await authHeaders()) },
       body: JSON.stringify({ tasks }),
     })
 
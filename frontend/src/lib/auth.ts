@@ -0,0 +1,8 @@
+import { supabase } from "./supabase"
+
+// Bearer header for the signed-in user's Supabase session; empty for guests.
+export async function authHeaders(): Promise<Record<string, string>> {
+  const { data } = await supabase.auth.getSession()
+  const token = data.session?.access_token
+  return token ? { Authorization: `Bearer ${token}` } : {}
+}
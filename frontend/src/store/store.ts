@@ -19,6 +19,7 @@ interface Plan {
   totalDurationMinutes: number
   totalBlocks: number
   quickTaskUsed: boolean
+  utilization?: number
   seedUsed?: number
   variationExplanation?: string
 }